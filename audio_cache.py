@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+WhisperRocket - Audio Cache
+Decode-once PCM cache: each file is decoded a single time to 16 kHz mono
+float32 in a memory-mapped cache file keyed by content hash. Transcription,
+diarization and duration probing all read the same mapping.
+"""
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+from disk_cache import DiskCache
+
+SAMPLE_RATE = 16000
+DEFAULT_MAX_MB = 2048  # Size bound for the cache directory, least recently used evicted first
+_HASH_BLOCK = 1024 * 1024
+
+_cache = DiskCache("audio_cache", ".f32", DEFAULT_MAX_MB)
+_lock = threading.Lock()  # guards index.json
+_key_locks: Dict[str, threading.Lock] = {}  # one hash per file / decode per content key at a time
+
+configure = _cache.configure
+get_cache_dir = _cache.directory
+
+
+# --- Content keys ---
+
+def _stat_key(file_path: str) -> str:
+    st = os.stat(file_path)
+    return f"{os.path.abspath(file_path)}|{st.st_size}|{st.st_mtime_ns}"
+
+
+def _load_index() -> Dict[str, str]:
+    try:
+        with open(get_cache_dir() / "index.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return {}
+
+
+def _save_index(index: Dict[str, str]):
+    directory = get_cache_dir()
+    tmp = directory / "index.json.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp, directory / "index.json")
+    except IOError as e:
+        print(f"[WARNING] Audio cache index write failed: {e}")
+
+
+def content_key(file_path: str) -> str:
+    """
+    BLAKE2b of the file content. Remembered per (path, size, mtime), so an
+    unchanged file is hashed only once.
+    """
+    stat_key = _stat_key(file_path)
+    with _lock:
+        key = _load_index().get(stat_key)
+        if not key:
+            hash_lock = _key_locks.setdefault(stat_key, threading.Lock())
+    if key:
+        return key
+
+    # Concurrent callers (prefetch, transcription, diarization) share one hash
+    with hash_lock:
+        with _lock:
+            key = _load_index().get(stat_key)
+        if key:
+            return key
+
+        digest = hashlib.blake2b(digest_size=16)
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(_HASH_BLOCK), b""):
+                digest.update(block)
+        key = digest.hexdigest()
+
+        with _lock:
+            index = _load_index()
+            index[stat_key] = key
+            _save_index(index)
+    return key
+
+
+def _cache_path(key: str) -> Path:
+    return _cache.path(key)
+
+
+def _cached_path(file_path: str) -> Optional[Path]:
+    """Cache file for file_path if it was decoded before (no hashing)"""
+    try:
+        stat_key = _stat_key(file_path)
+    except OSError:
+        return None
+    with _lock:
+        key = _load_index().get(stat_key)
+    if key and _cache_path(key).exists():
+        return _cache_path(key)
+    return None
+
+
+# --- Decoding ---
+
+def _decode_to(file_path: str, target: Path):
+    """Decode to raw 16 kHz mono float32 (ffmpeg streams to disk; PyAV fallback)"""
+    if shutil.which("ffmpeg"):
+        result = subprocess.run(
+            ["ffmpeg", "-nostdin", "-v", "error", "-y", "-i", file_path,
+             "-f", "f32le", "-ac", "1", "-ar", str(SAMPLE_RATE), str(target)],
+            capture_output=True, text=True,
+        )
+        if result.returncode == 0:
+            return
+        print(f"[WARNING] ffmpeg decode failed, trying PyAV: {result.stderr.strip()[-200:]}")
+
+    from faster_whisper import decode_audio
+    decode_audio(file_path, sampling_rate=SAMPLE_RATE).astype(np.float32).tofile(target)
+
+
+def _evict(keep: Path):
+    """Evict least recently used cache files and drop their index entries"""
+    evicted = _cache.evict(keep)
+    if evicted:
+        index = _load_index()
+        _save_index({k: v for k, v in index.items() if v not in evicted})
+
+
+def get_audio(file_path: str) -> np.ndarray:
+    """
+    16 kHz mono float32 samples of file_path as a copy-on-write memory map
+    (zero-copy reads; writes never reach the cache file). Decodes on first use.
+    """
+    key = content_key(file_path)
+    path = _cache_path(key)
+    with _lock:
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+
+    with key_lock:
+        if not path.exists():
+            tmp = path.with_suffix(".part")
+            try:
+                _decode_to(file_path, tmp)
+                os.replace(tmp, path)
+            finally:
+                if tmp.exists():
+                    tmp.unlink()
+            with _lock:
+                _evict(keep=path)
+        else:
+            _cache.touch(path)
+
+    if path.stat().st_size == 0:
+        return np.zeros(0, dtype=np.float32)
+    return np.memmap(path, dtype=np.float32, mode="c")
+
+
+def prefetch(file_path: str) -> threading.Thread:
+    """Decode into the cache in the background (errors surface on get_audio)"""
+    def run():
+        try:
+            get_audio(file_path)
+        except Exception as e:
+            print(f"[WARNING] Audio prefetch failed: {e}")
+
+    thread = threading.Thread(target=run, daemon=True, name="audio-prefetch")
+    thread.start()
+    return thread
+
+
+def cached_duration(file_path: str) -> Optional[float]:
+    """Duration in seconds from the cache file size, None if not decoded yet"""
+    path = _cached_path(file_path)
+    if path is None:
+        return None
+    return path.stat().st_size / 4 / SAMPLE_RATE
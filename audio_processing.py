@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+WhisperRocket - Audio Processing
+Helpers for handing microphone audio to Whisper without touching the disk.
+"""
+from functools import lru_cache
+from math import gcd
+
+import numpy as np
+
+WHISPER_SAMPLE_RATE = 16000  # Whisper models expect 16 kHz mono float32
+
+_CHUNK = 16384  # Output samples per vectorized filter step (bounds temporary memory)
+
+
+@lru_cache(maxsize=8)
+def _polyphase_filters(up: int, down: int):
+    """
+    Kaiser-windowed sinc lowpass split into `up` polyphase branches.
+
+    Returns:
+        (H, half): H[p, k] is tap k of phase p, half is the filter delay
+        in upsampled samples
+    """
+    half = 10 * max(up, down)
+    length = 2 * half + 1
+    cutoff = 1.0 / max(up, down)  # fraction of the upsampled Nyquist
+    t = np.arange(length) - half
+    h = cutoff * np.sinc(cutoff * t) * np.kaiser(length, 5.0) * up
+
+    n_taps = -(-length // up)
+    h = np.concatenate([h, np.zeros(n_taps * up - length)])
+    H = np.ascontiguousarray(h.reshape(n_taps, up).T, dtype=np.float32)
+    return H, half
+
+
+def _polyphase_apply(x: np.ndarray, H: np.ndarray, up: int, down: int, m0: int, n_out: int) -> np.ndarray:
+    """
+    Evaluate y[i] = sum_k H[m % up, k] * x[m // up - k] for m = m0 + i * down.
+    The caller guarantees every touched index of x is valid.
+
+    Outputs i, i + up, i + 2*up, ... share one phase and step through x by
+    `down`, so each phase group is a strided window view times a tap vector.
+    """
+    n_taps = H.shape[1]
+    if n_out < 4 * up:
+        # Short block (streaming): one gather beats a Python loop over the phases
+        m = m0 + np.arange(n_out, dtype=np.int64) * down
+        idx = (m // up)[:, None] - np.arange(n_taps)[None, :]
+        return np.einsum('ij,ij->i', H[m % up], x[idx]).astype(np.float32, copy=False)
+
+    windows = np.lib.stride_tricks.sliding_window_view(x, n_taps)
+    taps_rev = np.ascontiguousarray(H[:, ::-1])
+    out = np.empty(n_out, dtype=np.float32)
+    for r in range(min(up, n_out)):
+        m = m0 + r * down
+        first = m // up - n_taps + 1
+        n_group = len(range(r, n_out, up))
+        for s in range(0, n_group, _CHUNK):
+            e = min(s + _CHUNK, n_group)
+            group = windows[first + s * down:first + (e - 1) * down + 1:down]
+            out[r + s * up:r + e * up:up] = group @ taps_rev[m % up]
+    return out
+
+
+def resample_audio(audio: np.ndarray, orig_sr: int, target_sr: int = WHISPER_SAMPLE_RATE) -> np.ndarray:
+    """
+    Resample mono audio to target_sr with an anti-aliasing polyphase filter.
+
+    Args:
+        audio: float32 samples, shape (N,) or (N, 1)
+        orig_sr: Sample rate of the input
+        target_sr: Output sample rate (default: Whisper's 16 kHz)
+    """
+    audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+    if orig_sr == target_sr or len(audio) == 0:
+        return audio
+
+    g = gcd(orig_sr, target_sr)
+    up, down = target_sr // g, orig_sr // g
+    H, half = _polyphase_filters(up, down)
+    n_taps = H.shape[1]
+
+    # Zero padding on both sides keeps every filter index in range
+    padded = np.concatenate([
+        np.zeros(n_taps, dtype=np.float32), audio, np.zeros(n_taps + 1, dtype=np.float32)
+    ])
+    n_out = -(-len(audio) * up // down)
+    return _polyphase_apply(padded, H, up, down, half + n_taps * up, n_out)
+
+
+class StreamingResampler:
+    """
+    Block-by-block version of resample_audio() for the audio callback.
+
+    Carries the filter history across blocks, so the concatenated output is
+    identical to resampling the whole recording at once (delayed by the
+    filter's half length, well under a millisecond).
+    """
+
+    def __init__(self, orig_sr: int, target_sr: int = WHISPER_SAMPLE_RATE):
+        self.orig_sr = orig_sr
+        self.target_sr = target_sr
+        g = gcd(orig_sr, target_sr)
+        self._up, self._down = target_sr // g, orig_sr // g
+        self._H, self._half = _polyphase_filters(self._up, self._down)
+        self.reset()
+
+    def reset(self):
+        """Start a new stream (input history is zero, like resample_audio()'s padding)"""
+        n_taps = self._H.shape[1]
+        self._tail = np.zeros(n_taps, dtype=np.float32)
+        self._tail_start = -n_taps  # input index of self._tail[0]
+        self._next_out = 0          # index of the next output sample
+
+    @property
+    def passthrough(self) -> bool:
+        return self.orig_sr == self.target_sr
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """Resample one captured block, returns the output samples that became available"""
+        samples = block.reshape(-1)
+        if self.passthrough:
+            return samples
+
+        up, down, half = self._up, self._down, self._half
+        x = np.concatenate([self._tail, samples])
+        input_end = self._tail_start + len(x)
+
+        # Output i needs input index (half + i*down) // up
+        available = (input_end * up - half - 1) // down + 1
+        n_out = max(available - self._next_out, 0)
+        m0 = half + self._next_out * down - self._tail_start * up
+        out = _polyphase_apply(x, self._H, up, down, m0, n_out)
+        self._next_out += n_out
+
+        # Keep only the history the next output still reaches back to
+        keep_from = min((half + self._next_out * down) // up - self._H.shape[1] + 1, input_end)
+        self._tail = x[keep_from - self._tail_start:].copy()
+        self._tail_start = keep_from
+        return out
+
+
+class AudioRecorder:
+    """
+    Recording buffer the audio callback writes into in place.
+
+    Backed by one preallocated float32 array whose capacity doubles when it
+    fills up, so a recording costs O(log n) allocations instead of one per
+    PortAudio block, and stopping needs no concatenation.
+    """
+
+    def __init__(self, sample_rate: int, initial_seconds: float = 30.0):
+        self.sample_rate = sample_rate
+        self._initial_capacity = max(int(sample_rate * initial_seconds), 1)
+        self._buffer = None
+        self._length = 0
+        self.high_water_bytes = 0  # largest buffer allocated so far
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def duration(self) -> float:
+        """Recorded length in seconds"""
+        return self._length / self.sample_rate
+
+    def reset(self):
+        """Start a new recording (reuses the buffer unless it was handed out with take())"""
+        self._length = 0
+        if self._buffer is None:
+            self._allocate(self._initial_capacity)
+
+    def write(self, block: np.ndarray) -> np.ndarray:
+        """
+        Append a block in place (called from the audio callback).
+
+        Returns:
+            Zero-copy view of the written samples
+        """
+        buffer = self._buffer
+        if buffer is None:
+            # Late block after take() - the recording is already handed out
+            return block.reshape(-1)
+
+        samples = block.reshape(-1)
+        start = self._length
+        end = start + len(samples)
+        if end > len(buffer):
+            buffer = self._grow(end)
+        buffer[start:end] = samples
+        self._length = end
+        return buffer[start:end]
+
+    def view(self, start: int = 0, end: int = None) -> np.ndarray:
+        """Zero-copy view of the recorded samples"""
+        if self._buffer is None:
+            return np.zeros(0, dtype=np.float32)
+        end = self._length if end is None else min(end, self._length)
+        return self._buffer[start:end]
+
+    def take(self) -> np.ndarray:
+        """
+        Hand out the recording as a zero-copy view.
+        The next reset() allocates a fresh buffer, so the view is never overwritten.
+        """
+        audio = self.view()
+        self._buffer = None
+        self._length = 0
+        return audio
+
+    def _allocate(self, capacity: int) -> np.ndarray:
+        self._buffer = np.empty(capacity, dtype=np.float32)
+        self.high_water_bytes = max(self.high_water_bytes, self._buffer.nbytes)
+        return self._buffer
+
+    def _grow(self, required: int) -> np.ndarray:
+        """Amortized doubling; views handed out earlier keep the old array alive"""
+        old = self._buffer
+        capacity = max(len(old) * 2, required)
+        new = np.empty(capacity, dtype=np.float32)
+        new[:self._length] = old[:self._length]
+        self._buffer = new
+        self.high_water_bytes = max(self.high_water_bytes, new.nbytes)
+        return new
+
+
+class PreRollBuffer:
+    """
+    Fixed-size ring that always holds the last N milliseconds of audio.
+
+    Single producer (the audio callback) and single consumer: write() fills
+    the slots first and publishes the new total afterwards, so readers never
+    need a lock. A snapshot racing a write can lose at most the oldest block.
+    """
+
+    def __init__(self, sample_rate: int, milliseconds: int):
+        self.capacity = max(int(sample_rate * milliseconds / 1000), 0)
+        self._buffer = np.zeros(self.capacity, dtype=np.float32)
+        self._written = 0     # total samples ever written (only grows)
+        self._cleared_at = 0  # _written at the last clear()
+
+    def write(self, block: np.ndarray):
+        """Store a block, overwriting the oldest samples"""
+        capacity = self.capacity
+        if capacity == 0:
+            return
+        samples = block.reshape(-1)
+        n = len(samples)
+        m = min(n, capacity)
+        start = (self._written + n - m) % capacity
+        first = min(m, capacity - start)
+        self._buffer[start:start + first] = samples[n - m:n - m + first]
+        if first < m:
+            self._buffer[:m - first] = samples[n - m + first:]
+        self._written += n
+
+    def snapshot(self) -> np.ndarray:
+        """Copy of the buffered samples in chronological order"""
+        written = self._written
+        available = min(written - self._cleared_at, self.capacity)
+        if available <= 0:
+            return np.zeros(0, dtype=np.float32)
+        start = (written - available) % self.capacity
+        end = start + available
+        if end <= self.capacity:
+            return self._buffer[start:end].copy()
+        return np.concatenate([self._buffer[start:], self._buffer[:end - self.capacity]])
+
+    def clear(self):
+        """Forget the buffered samples (they now belong to a recording)"""
+        self._cleared_at = self._written
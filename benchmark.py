@@ -0,0 +1,773 @@
+#!/usr/bin/env python3
+"""
+WhisperRocket - Benchmarks
+Micro-benchmarks for the dictation and file transcription hot paths.
+
+Usage:
+    python benchmark.py <name> [options]
+    python benchmark.py --help
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+
+def _per_call_us(fn, iterations: int) -> float:
+    """Average wall time of fn() in microseconds"""
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+# --- Dictation capture ---
+
+def bench_preroll(args):
+    """Idle audio callback cost with and without the pre-roll ring"""
+    from audio_processing import PreRollBuffer
+
+    block = np.random.default_rng(0).uniform(-0.1, 0.1, (args.blocksize, 1)).astype(np.float32)
+    blocks_per_sec = args.rate / args.blocksize
+    preroll = PreRollBuffer(args.rate, args.ms)
+    recording = False
+
+    def idle_baseline():
+        if recording:
+            pass
+
+    def idle_preroll():
+        if not recording:
+            preroll.write(block)
+
+    print(f"Pre-roll: {args.ms} ms @ {args.rate} Hz, block {args.blocksize} samples "
+          f"({blocks_per_sec:.0f} blocks/s)")
+    for name, fn in (("baseline", idle_baseline), ("pre-roll", idle_preroll)):
+        us = _per_call_us(fn, args.iterations)
+        cpu = us * blocks_per_sec / 1e6 * 100
+        print(f"  {name:10s} {us:8.2f} us/block   {cpu:.4f}% of one core")
+
+    # Snapshot cost is paid once per recording (first callback block)
+    for _ in range(int(blocks_per_sec)):
+        preroll.write(block)
+    us = _per_call_us(preroll.snapshot, 1000)
+    print(f"  snapshot   {us:8.2f} us/recording")
+
+
+def _reference_resample(x: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+    """scipy's resample_poly if installed, otherwise an ideal FFT resampler"""
+    try:
+        from math import gcd
+        from scipy.signal import resample_poly
+        g = gcd(orig_sr, target_sr)
+        return resample_poly(x, target_sr // g, orig_sr // g).astype(np.float32)
+    except ImportError:
+        n_out = int(round(len(x) * target_sr / orig_sr))
+        spectrum = np.fft.rfft(x)[:n_out // 2 + 1]
+        return (np.fft.irfft(spectrum, n_out) * n_out / len(x)).astype(np.float32)
+
+
+def bench_resample(args):
+    """Capture-side streaming resampler: accuracy against a reference and throughput"""
+    from audio_processing import WHISPER_SAMPLE_RATE, StreamingResampler, resample_audio
+
+    rng = np.random.default_rng(0)
+    seconds = args.seconds
+    for rate in args.rates:
+        # In-band test signal: a few tones below 7 kHz plus a little noise
+        t = np.arange(rate * seconds) / rate
+        x = sum(0.2 * np.sin(2 * np.pi * f * t) for f in (220, 1000, 3300, 6800))
+        x = (x + rng.normal(0, 0.01, len(t))).astype(np.float32)
+
+        resampler = StreamingResampler(rate)
+        out = []
+        start = time.perf_counter()
+        for i in range(0, len(x), args.blocksize):
+            out.append(resampler.process(x[i:i + args.blocksize]))
+        elapsed = time.perf_counter() - start
+        streamed = np.concatenate(out)
+
+        one_shot = resample_audio(x, rate)
+        reference = _reference_resample(x, rate, WHISPER_SAMPLE_RATE)
+        n = min(len(streamed), len(reference))
+        edge = WHISPER_SAMPLE_RATE // 10  # skip filter start-up / FFT wrap-around
+        diff = streamed[edge:n - edge] - reference[edge:n - edge]
+        snr = 10 * np.log10(np.mean(reference[edge:n - edge] ** 2) / max(np.mean(diff ** 2), 1e-20))
+        exact = np.abs(streamed - one_shot[:len(streamed)]).max()
+
+        blocks = -(-len(x) // args.blocksize)
+        print(f"{rate:6d} Hz -> 16 kHz: SNR vs reference {snr:6.1f} dB, "
+              f"max |streamed - one-shot| {exact:.1e}, "
+              f"{elapsed / blocks * 1e6:7.1f} us/block, {seconds / elapsed:7.0f}x realtime")
+
+
+# --- Dictation post-decode tail ---
+
+def bench_paste_tail(args):
+    """Decode completion -> pasted text: old sequential tail vs pipelined tail"""
+    from concurrent.futures import ThreadPoolExecutor
+    import pyperclip
+    from platform_support import get_platform_handler
+
+    handler = get_platform_handler()
+    executor = ThreadPoolExecutor(max_workers=1)
+    decode = args.decode_ms / 1000.0
+
+    def paste(is_terminal):
+        if args.paste:
+            handler.paste_text(is_terminal=is_terminal)
+
+    def detect():
+        return handler.is_terminal_window(handler.get_active_window_class())
+
+    def sequential(text):
+        time.sleep(decode)
+        done = time.perf_counter()
+        pyperclip.copy(text)
+        time.sleep(0.3)
+        paste(detect())
+        return time.perf_counter() - done
+
+    def pipelined(text):
+        window_future = executor.submit(detect)  # started at stop, overlaps the decode
+        time.sleep(decode)
+        done = time.perf_counter()
+        pyperclip.copy(text)
+        handler.wait_for_clipboard(text)
+        paste(window_future.result())
+        return time.perf_counter() - done
+
+    print(f"Decode simulated as {args.decode_ms} ms sleep, paste keystroke {'ON' if args.paste else 'OFF'}")
+    for name, fn in (("sequential", sequential), ("pipelined", pipelined)):
+        times = sorted(fn(f"WhisperRocket benchmark {name} {i}") * 1000 for i in range(args.iterations))
+        print(f"  {name:10s} decode->paste p50 {times[len(times) // 2]:7.1f} ms   "
+              f"max {times[-1]:7.1f} ms")
+
+
+# --- Speaker merge ---
+
+def _merge_speakers_quadratic(segments, diarization):
+    """The previous O(segments x turns) merge, for comparison"""
+    for seg in segments:
+        best_speaker, best_overlap = "", 0.0
+        for (turn_start, turn_end), speaker in diarization.items():
+            overlap = max(0.0, min(seg.end, turn_end) - max(seg.start, turn_start))
+            if overlap > best_overlap:
+                best_overlap, best_speaker = overlap, speaker
+        seg.speaker = best_speaker
+    return segments
+
+
+def bench_speaker_merge(args):
+    """Speaker merge: quadratic loop vs interval index, segment and word level"""
+    from diarization_manager import merge_speakers
+    from transcription_engine import TranscriptionSegment
+
+    rng = np.random.default_rng(0)
+    for n in args.sizes:
+        # n turns and n segments of ~3 s over a meeting of matching length
+        length = n * 3.0
+        starts = np.sort(rng.uniform(0, length, n))
+        diarization = {(s, s + d): f"SPEAKER_{k:02d}" for s, d, k in
+                       zip(starts, rng.uniform(0.5, 6.0, n), rng.integers(0, args.speakers, n))}
+
+        def make_segments():
+            segs = []
+            for s in np.sort(rng.uniform(0, length, n)):
+                words = [(s + i * 0.4, s + i * 0.4 + 0.35, f" w{i}") for i in range(8)]
+                segs.append(TranscriptionSegment(start=s, end=s + 3.2, text="", words=words))
+            return segs
+
+        line = f"  {n:7d} segments x {n:7d} turns:"
+        if n <= args.max_quadratic:
+            segs = make_segments()
+            start = time.perf_counter()
+            _merge_speakers_quadratic(segs, diarization)
+            line += f"  quadratic {(time.perf_counter() - start) * 1000:9.1f} ms"
+        else:
+            line += "  quadratic   (skipped)"
+        for word_level in (False, True):
+            segs = make_segments()
+            start = time.perf_counter()
+            merge_speakers(segs, diarization, word_level=word_level)
+            name = "word-level" if word_level else "index"
+            line += f"  {name} {(time.perf_counter() - start) * 1000:8.1f} ms"
+        print(line)
+
+
+# --- File window ---
+
+_WINDOW_OPEN_SCRIPT = """
+import os, sys, time
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, {root!r})
+from PySide6.QtWidgets import QApplication
+app = QApplication([])
+import diarization_manager
+if {legacy!r}:
+    def is_available(refresh=False):
+        try:
+            import pyannote.audio
+            return True
+        except ImportError:
+            return False
+    diarization_manager.is_available = is_available
+from file_transcription_window import FileTranscriptionWindow
+start = time.perf_counter()
+window = FileTranscriptionWindow(None, "faster-whisper", {{"diarization_preload": False}}, "en", None)
+window.show()
+app.processEvents()
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def bench_window_open(args):
+    """File transcription window open time: importing pyannote to probe vs find_spec"""
+    import subprocess
+    import sys
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    for name, legacy in (("import probe", True), ("find_spec probe", False)):
+        times = []
+        for _ in range(args.iterations):
+            # Fresh interpreter each time: nothing imported yet, like a first open
+            out = subprocess.run([sys.executable, "-c", _WINDOW_OPEN_SCRIPT.format(root=root, legacy=legacy)],
+                                 capture_output=True, text=True, check=True)
+            times.append(float(out.stdout.strip().splitlines()[-1]))
+        times.sort()
+        print(f"  {name:16s} window open p50 {times[len(times) // 2]:7.1f} ms   max {times[-1]:7.1f} ms")
+
+
+# --- Dictation under file transcription load ---
+
+class _FakeWhisperModel:
+    """
+    Stand-in for a faster-whisper model: decodes 30 s chunks lazily, taking
+    rtf seconds of wall time per second of audio, and yields one segment per
+    segment_seconds of each chunk.
+    """
+
+    def __init__(self, rtf: float, segment_seconds: float = 5.0):
+        self.rtf = rtf
+        self.segment_seconds = segment_seconds
+
+    def transcribe(self, audio, **kwargs):
+        from types import SimpleNamespace
+        duration = len(audio) / 16000
+
+        def segments():
+            for chunk_start in np.arange(0.0, duration, 30.0):
+                chunk_end = min(chunk_start + 30.0, duration)
+                time.sleep((chunk_end - chunk_start) * self.rtf)
+                for start in np.arange(chunk_start, chunk_end, self.segment_seconds):
+                    end = min(start + self.segment_seconds, chunk_end)
+                    yield SimpleNamespace(start=float(start), end=float(end), text=" lorem ipsum")
+
+        return segments(), SimpleNamespace(duration=duration)
+
+
+def bench_file_contention(args):
+    """Dictation latency while a long file is being transcribed: idle, whole-file job, windowed jobs"""
+    import random
+    import threading
+    from inference_scheduler import InferenceScheduler, PRIORITY_DICTATION, PRIORITY_FILE
+    from transcription_engine import TranscriptionEngine
+
+    model = _FakeWhisperModel(args.rtf)
+    audio = np.zeros(int(args.file_seconds * 16000), dtype=np.float32)
+    dictation = args.dictation_ms / 1000.0
+
+    def run(mode):
+        scheduler = InferenceScheduler(threading.Lock(), name=f"bench-{mode}")
+        done = threading.Event()
+        files = []
+
+        def file_worker():
+            while not done.is_set():
+                start = time.perf_counter()
+                if mode == "whole-file":
+                    # Old behaviour: the full file is one model job
+                    scheduler.run(lambda: list(model.transcribe(audio)[0]), PRIORITY_FILE, "file")
+                else:
+                    engine = TranscriptionEngine(model, "faster-whisper", scheduler.model_lock, scheduler,
+                                                 window_seconds=args.window)
+                    engine._load_audio = lambda path: audio
+                    engine.transcribe_file("bench.wav", "en")
+                files.append(time.perf_counter() - start)
+
+        if mode != "idle":
+            threading.Thread(target=file_worker, daemon=True).start()
+            time.sleep(0.1)
+
+        rng = random.Random(0)
+        latencies = []
+        for _ in range(args.dictations):
+            time.sleep(rng.uniform(0.1, 0.5))  # user speaking
+            start = time.perf_counter()
+            scheduler.run(lambda: time.sleep(dictation), PRIORITY_DICTATION, "dictation")
+            latencies.append((time.perf_counter() - start) * 1000)
+        while mode != "idle" and not files:
+            time.sleep(0.05)  # let one file pass finish for the throughput figure
+        done.set()
+
+        latencies.sort()
+        p = lambda q: latencies[min(int(q * len(latencies)), len(latencies) - 1)]
+        throughput = f"   file {args.file_seconds / files[0]:6.1f}x realtime" if files else ""
+        print(f"  {mode:10s} dictation p50 {p(0.5):7.0f} ms   p95 {p(0.95):7.0f} ms   "
+              f"max {latencies[-1]:7.0f} ms{throughput}")
+
+    print(f"Fake model at {args.rtf}x realtime, {args.file_seconds:.0f} s file, "
+          f"{args.window:.0f} s windows, dictation decode {args.dictation_ms} ms")
+    for mode in ("idle", "whole-file", "windowed"):
+        run(mode)
+
+
+def bench_first_segment(args):
+    """Time to the first segment callback: draining the generator vs streamed windows"""
+    import threading
+    from transcription_engine import TranscriptionEngine
+
+    model = _FakeWhisperModel(args.rtf)
+    print(f"Fake model at {args.rtf}x realtime")
+    for seconds in args.file_seconds:
+        audio = np.zeros(int(seconds * 16000), dtype=np.float32)
+
+        # Old behaviour: list(segments_gen), then the first callback
+        start = time.perf_counter()
+        list(model.transcribe(audio)[0])
+        drained = time.perf_counter() - start
+
+        engine = TranscriptionEngine(model, "faster-whisper", threading.Lock())
+        engine._load_audio = lambda path: audio
+        first = []
+
+        def on_segment(seg):
+            first.append(time.perf_counter() - start)
+            engine.cancel()
+
+        start = time.perf_counter()
+        engine.transcribe_file("bench.wav", "en", segment_callback=on_segment)
+        print(f"  {seconds:6.0f} s file: first segment after {drained * 1000:7.0f} ms (drained) "
+              f"vs {first[0] * 1000:5.0f} ms (streamed)")
+
+
+# --- File transcription throughput (real model) ---
+
+def bench_batched(args):
+    """Real-time factor of sequential vs batched file transcription"""
+    import threading
+    from faster_whisper import WhisperModel
+    from transcription_engine import TranscriptionEngine
+
+    model = WhisperModel(args.model, device=args.device, compute_type=args.compute_type)
+    engine = TranscriptionEngine(model, "faster-whisper", threading.Lock())
+    audio = engine._load_audio(args.file)
+    duration = len(audio) / 16000
+    engine._load_audio = lambda path: audio  # time decoding only
+
+    print(f"{args.model} on {args.device} ({args.compute_type}), {duration:.0f} s of audio")
+    for batch_size in [0] + args.batch_sizes:
+        engine.batch_size = batch_size
+        start = time.perf_counter()
+        result = engine.transcribe_file(args.file, args.language)
+        elapsed = time.perf_counter() - start
+        name = "sequential" if batch_size == 0 else f"batch {batch_size}"
+        print(f"  {name:10s} RTF {elapsed / duration:.3f} ({duration / elapsed:5.1f}x realtime), "
+              f"{len(result.segments)} segments")
+
+
+def bench_farm(args):
+    """Multi-process CPU transcription scaling for 1/2/4/8 workers"""
+    import threading
+    from model_manager import get_model_path_for_loading
+    from transcription_engine import TranscriptionEngine
+    from transcription_farm import TranscriptionFarm, find_shards, recommend_workers, total_ram_gb
+
+    engine = TranscriptionEngine(None, "faster-whisper", threading.Lock())
+    audio = engine._load_audio(args.file)
+    duration = len(audio) / 16000
+    engine._load_audio = lambda path: audio  # time decoding only
+
+    auto_workers, auto_threads = recommend_workers(args.model)
+    ram = total_ram_gb()
+    print(f"{args.model} int8, {duration:.0f} s of audio in {len(find_shards(audio))} shards; "
+          f"{os.cpu_count()} cores, {ram or 0:.0f} GB RAM -> recommended "
+          f"{auto_workers} workers x {auto_threads} threads")
+
+    model_path = get_model_path_for_loading(args.model, "cpu")
+    for workers in args.workers:
+        threads = args.threads or auto_threads
+        engine.farm = TranscriptionFarm(model_path, workers, threads)
+        start = time.perf_counter()
+        engine.transcribe_file(args.file, args.language)
+        elapsed = time.perf_counter() - start  # includes loading the model in every worker
+        print(f"  {workers} x {threads} threads: {elapsed:6.1f} s, {duration / elapsed:5.1f}x realtime")
+
+
+def bench_cancel_latency(args):
+    """Time from Cancel until the model is free again and transcribe_file() returns"""
+    import random
+    import threading
+    from inference_scheduler import InferenceScheduler, PRIORITY_DICTATION, PRIORITY_FILE
+    from transcription_engine import TranscriptionEngine
+
+    model = _FakeWhisperModel(args.rtf)
+    audio = np.zeros(int(args.file_seconds * 16000), dtype=np.float32)
+    rng = random.Random(0)
+
+    print(f"Fake model at {args.rtf}x realtime, {args.file_seconds:.0f} s file, {args.window:.0f} s windows")
+    for mode in ("whole-file", "windowed"):
+        scheduler = InferenceScheduler(threading.Lock(), name=f"bench-{mode}")
+        freed, returned = [], []
+        for _ in range(args.iterations):
+            engine = TranscriptionEngine(model, "faster-whisper", scheduler.model_lock, scheduler,
+                                         window_seconds=args.window)
+            engine._load_audio = lambda path: audio
+            if mode == "whole-file":
+                # Old behaviour: one job drains the generator, the flag is checked afterwards
+                target = lambda: scheduler.run(lambda: list(model.transcribe(audio)[0]), PRIORITY_FILE, "file")
+            else:
+                target = lambda: engine.transcribe_file("bench.wav", "en")
+            worker = threading.Thread(target=target, daemon=True)
+            worker.start()
+            time.sleep(rng.uniform(0.2, 1.5))
+
+            start = time.perf_counter()
+            engine.cancel()
+            scheduler.run(lambda: None, PRIORITY_DICTATION, "probe")  # runs once the model is free
+            freed.append((time.perf_counter() - start) * 1000)
+            worker.join()
+            returned.append((time.perf_counter() - start) * 1000)
+
+        print(f"  {mode:10s} model free after cancel: mean {np.mean(freed):7.0f} ms  max {max(freed):7.0f} ms   "
+              f"transcribe_file returned: max {max(returned):7.0f} ms")
+
+
+# --- Dictation history ---
+
+def _history_entries(count: int, text_chars: int):
+    import uuid
+    from datetime import datetime
+    text = ("lorem ipsum dolor sit amet " * (text_chars // 27 + 1))[:text_chars]
+    return [{"id": str(uuid.uuid4()), "timestamp": datetime.now().isoformat(), "text": text,
+             "duration_sec": 4.2, "language": "en"} for _ in range(count)]
+
+
+def _legacy_history_add(path, entry):
+    """Old add_entry(): load, insert, size check, rewrite the whole JSON file"""
+    import json
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    data["entries"].insert(0, entry)
+    json.dumps(data, ensure_ascii=False).encode("utf-8")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def bench_history_add(args):
+    """add_entry() latency as the history grows: full JSON rewrite vs journal append"""
+    import json
+    import tempfile
+    from pathlib import Path
+    import history_manager
+
+    print(f"{args.text_chars}-char entries, {args.adds} adds per size")
+    for count in args.sizes:
+        entries = _history_entries(count, args.text_chars)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "history.json"
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"entries": entries}, f, ensure_ascii=False, indent=2)
+            size_mb = path.stat().st_size / 1024 ** 2
+            new = _history_entries(args.adds, args.text_chars)
+
+            start = time.perf_counter()
+            for entry in new:
+                _legacy_history_add(path, entry)
+            legacy = (time.perf_counter() - start) / args.adds * 1000
+
+            # The same (old format) file is migrated in place by the journal store
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"entries": entries}, f, ensure_ascii=False, indent=2)
+            history_manager.configure(directory=Path(tmp))
+            times = []
+            for entry in new:
+                start = time.perf_counter()
+                history_manager.add_entry(entry["text"], entry["duration_sec"], entry["language"])
+                times.append((time.perf_counter() - start) * 1000)
+            history_manager.compact()
+            assert len(history_manager.load_history()["entries"]) == count + args.adds
+            history_manager.configure()
+
+        print(f"  {count:7d} entries ({size_mb:6.1f} MB): rewrite {legacy:8.2f} ms/add   "
+              f"journal mean {np.mean(times):6.2f} ms  max {max(times):6.2f} ms")
+
+
+def _legacy_enforce_size_limit(data, limit):
+    """Old enforce_size_limit(): json.dumps of the whole history after every pop"""
+    import json
+    current_size = len(json.dumps(data, ensure_ascii=False).encode("utf-8"))
+    while current_size > limit and data["entries"]:
+        data["entries"].pop()
+        current_size = len(json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+
+def bench_history_trim(args):
+    """Size limit enforcement on a near-full history, trimming k entries"""
+    import json
+    import history_manager
+
+    entries = _history_entries(int(args.mb * 1024 ** 2 / (args.text_chars + 130)), args.text_chars)
+    full = len(json.dumps({"entries": entries}, ensure_ascii=False).encode("utf-8"))
+    entry_size = len(json.dumps(entries[0], ensure_ascii=False).encode("utf-8")) + 2
+    print(f"{len(entries)} entries, {full / 1024 ** 2:.1f} MB")
+
+    saved = history_manager.MAX_HISTORY_SIZE_BYTES
+    try:
+        for k in args.trim:
+            limit = full - (k - 1) * entry_size - 1  # exactly k entries over the cap
+            history_manager.MAX_HISTORY_SIZE_BYTES = limit
+            data = {"entries": list(entries)}
+            start = time.perf_counter()
+            history_manager.enforce_size_limit(data)
+            new = (time.perf_counter() - start) * 1000
+            assert len(data["entries"]) == len(entries) - k
+
+            if k <= args.max_legacy:
+                data = {"entries": list(entries)}
+                start = time.perf_counter()
+                _legacy_enforce_size_limit(data, limit)
+                legacy = f"{(time.perf_counter() - start) * 1000:9.0f} ms"
+            else:
+                legacy = "  skipped"
+            print(f"  trim {k:5d}: repeated dumps {legacy}   running total {new:7.0f} ms")
+    finally:
+        history_manager.MAX_HISTORY_SIZE_BYTES = saved
+
+
+def bench_history_query(args):
+    """Recent / by-id / search / date range queries: journal backend vs SQLite"""
+    import json
+    import random
+    import tempfile
+    from datetime import datetime, timedelta
+    from pathlib import Path
+    import history_manager
+
+    rng = random.Random(0)
+    words = ["meeting", "budget", "release", "invoice", "customer", "deadline", "report", "review",
+             "kernel", "python", "whisper", "rocket", "summary", "today", "tomorrow", "project"]
+    base = datetime(2024, 1, 1)
+    entries = []
+    for i in range(args.entries):
+        text = " ".join(rng.choice(words) for _ in range(args.words))
+        entries.append({"id": f"entry-{i}", "timestamp": (base + timedelta(minutes=i)).isoformat(),
+                        "text": text, "duration_sec": 4.2, "language": "en"})
+    entries.reverse()  # newest first, as stored
+    lookup_ids = [f"entry-{rng.randrange(args.entries)}" for _ in range(20)]
+    range_start = (base + timedelta(minutes=args.entries // 2)).isoformat()
+    range_end = (base + timedelta(minutes=args.entries // 2 + 1440)).isoformat()
+
+    print(f"{args.entries} entries, {args.words} words each")
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(Path(tmp) / "history.json", "w", encoding="utf-8") as f:
+            json.dump({"entries": entries}, f, ensure_ascii=False)
+        for backend in history_manager.BACKENDS:
+            history_manager.configure(directory=Path(tmp), backend=backend)
+            start = time.perf_counter()
+            history_manager.get_stats()  # opens the store (SQLite: one-time import)
+            opened = (time.perf_counter() - start) * 1000
+
+            def timed(fn, iterations):
+                start = time.perf_counter()
+                for i in range(iterations):
+                    fn(i)
+                return (time.perf_counter() - start) / iterations * 1000
+
+            recent = timed(lambda i: history_manager.get_recent(15), 5)
+            by_id = timed(lambda i: history_manager.get_entry_by_id(lookup_ids[i]), len(lookup_ids))
+            search = timed(lambda i: history_manager.search("budget deadline", 20), 5)
+            day = timed(lambda i: history_manager.get_range(range_start, range_end), 5)
+            print(f"  {backend:8s} open {opened:7.0f} ms   recent {recent:7.2f} ms   by id {by_id:7.2f} ms   "
+                  f"search {search:7.2f} ms   one day {day:7.2f} ms")
+        history_manager.configure()
+
+
+def bench_history_menu(args):
+    """Tray menu open (get_recent(15) + get_stats()): full parse per call vs the in-memory cache"""
+    import json
+    import tempfile
+    from pathlib import Path
+    import history_manager
+
+    print(f"{args.text_chars}-char entries")
+    for count in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(Path(tmp) / "history.json", "w", encoding="utf-8") as f:
+                json.dump({"entries": _history_entries(count, args.text_chars)}, f, ensure_ascii=False)
+            history_manager.configure(directory=Path(tmp))
+
+            def uncached():
+                # What the menu did before: two full loads
+                history_manager._load_journal()["entries"][:15]
+                len(history_manager._load_journal()["entries"])
+
+            def menu():
+                history_manager.get_recent(15)
+                history_manager.get_stats()
+
+            old = _per_call_us(uncached, 3) / 1000
+            start = time.perf_counter()
+            menu()  # first open fills the cache
+            first = (time.perf_counter() - start) * 1000
+            warm = _per_call_us(menu, 200) / 1000
+            history_manager.add_entry("new dictation", 1.0, "en")
+            after_add = _per_call_us(menu, 200) / 1000
+            history_manager.configure()
+
+        print(f"  {count:7d} entries: uncached {old:8.1f} ms   first open {first:8.1f} ms   "
+              f"cached {warm:6.3f} ms   after add_entry {after_add:6.3f} ms")
+
+
+def bench_history_writer(args):
+    """History write cost on the dictation path: synchronous add_entry() vs the background writer"""
+    import json
+    import tempfile
+    from pathlib import Path
+    import history_manager
+    import metrics
+
+    print(f"{args.entries} entries in history, {args.dictations} dictations {args.interval_ms} ms apart")
+    for backend in history_manager.BACKENDS:
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(Path(tmp) / "history.json", "w", encoding="utf-8") as f:
+                json.dump({"entries": _history_entries(args.entries, args.text_chars)}, f, ensure_ascii=False)
+            history_manager.configure(directory=Path(tmp), backend=backend)
+            history_manager.get_stats()  # open / import / fill the cache outside the timing
+
+            results = {}
+            for mode, add in (("sync", history_manager.add_entry), ("async", history_manager.add_entry_async)):
+                times = []
+                for i in range(args.dictations):
+                    start = time.perf_counter()
+                    add(f"dictation {i} " * 20, 3.0, "en")
+                    times.append((time.perf_counter() - start) * 1000)
+                    time.sleep(args.interval_ms / 1000)
+                history_manager.flush()
+                results[mode] = times
+            history_manager.configure()
+
+        lag = metrics.snapshot()["histograms_ms"].get("history.write_lag", {})
+        line = "   ".join(f"{mode} p50 {np.percentile(t, 50):6.3f} ms  max {max(t):6.3f} ms"
+                          for mode, t in results.items())
+        print(f"  {backend:8s} {line}   write lag p95 {lag.get('p95', 0):6.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WhisperRocket benchmarks")
+    sub = parser.add_subparsers(dest="name", required=True)
+
+    p = sub.add_parser("preroll", help="idle audio callback cost of the pre-roll ring")
+    p.add_argument("--rate", type=int, default=48000, help="capture sample rate")
+    p.add_argument("--blocksize", type=int, default=480, help="samples per PortAudio block")
+    p.add_argument("--ms", type=int, default=300, help="pre-roll length in milliseconds")
+    p.add_argument("--iterations", type=int, default=100000)
+    p.set_defaults(func=bench_preroll)
+
+    p = sub.add_parser("resample", help="streaming 16 kHz resampler accuracy and throughput")
+    p.add_argument("--rates", type=int, nargs="+", default=[48000, 44100, 32000, 22050])
+    p.add_argument("--blocksize", type=int, default=480, help="samples per PortAudio block")
+    p.add_argument("--seconds", type=float, default=10.0)
+    p.set_defaults(func=bench_resample)
+
+    p = sub.add_parser("paste-tail", help="decode completion to pasted text (needs X11, xclip/xsel, xdotool)")
+    p.add_argument("--decode-ms", type=int, default=500, help="simulated decode time")
+    p.add_argument("--iterations", type=int, default=10)
+    p.add_argument("--paste", action="store_true", help="really send the paste keystroke to the active window")
+    p.set_defaults(func=bench_paste_tail)
+
+    p = sub.add_parser("file-contention", help="dictation latency while a file is transcribed (fake model)")
+    p.add_argument("--rtf", type=float, default=0.02, help="fake model seconds per audio second")
+    p.add_argument("--file-seconds", type=float, default=300.0)
+    p.add_argument("--window", type=float, default=30.0, help="file transcription window in seconds")
+    p.add_argument("--dictation-ms", type=int, default=150, help="fake dictation decode time")
+    p.add_argument("--dictations", type=int, default=8)
+    p.set_defaults(func=bench_file_contention)
+
+    p = sub.add_parser("first-segment", help="file transcription time to first segment (fake model)")
+    p.add_argument("--rtf", type=float, default=0.01, help="fake model seconds per audio second")
+    p.add_argument("--file-seconds", type=float, nargs="+", default=[60.0, 300.0, 1200.0])
+    p.set_defaults(func=bench_first_segment)
+
+    p = sub.add_parser("batched", help="sequential vs batched file transcription RTF (real model)")
+    p.add_argument("file", help="audio/video file to transcribe")
+    p.add_argument("--model", default="small")
+    p.add_argument("--device", default="cpu")
+    p.add_argument("--compute-type", default="int8")
+    p.add_argument("--language", default="en")
+    p.add_argument("--batch-sizes", type=int, nargs="+", default=[4, 8, 16])
+    p.set_defaults(func=bench_batched)
+
+    p = sub.add_parser("farm", help="multi-process CPU transcription scaling (real model)")
+    p.add_argument("file", help="audio/video file to transcribe")
+    p.add_argument("--model", default="small")
+    p.add_argument("--language", default="en")
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    p.add_argument("--threads", type=int, default=0, help="threads per worker (0 = recommended)")
+    p.set_defaults(func=bench_farm)
+
+    p = sub.add_parser("speaker-merge", help="diarization speaker merge at 1k/10k/100k intervals")
+    p.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    p.add_argument("--speakers", type=int, default=6)
+    p.add_argument("--max-quadratic", type=int, default=1000, help="skip the old merge above this size")
+    p.set_defaults(func=bench_speaker_merge)
+
+    p = sub.add_parser("window-open", help="file transcription window open time (needs PySide6)")
+    p.add_argument("--iterations", type=int, default=5)
+    p.set_defaults(func=bench_window_open)
+
+    p = sub.add_parser("cancel-latency", help="file transcription cancel latency (fake model)")
+    p.add_argument("--rtf", type=float, default=0.02, help="fake model seconds per audio second")
+    p.add_argument("--file-seconds", type=float, default=300.0)
+    p.add_argument("--window", type=float, default=30.0, help="file transcription window in seconds")
+    p.add_argument("--iterations", type=int, default=5)
+    p.set_defaults(func=bench_cancel_latency)
+
+    p = sub.add_parser("history-add", help="dictation history add latency as the history grows")
+    p.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    p.add_argument("--text-chars", type=int, default=300)
+    p.add_argument("--adds", type=int, default=20)
+    p.set_defaults(func=bench_history_add)
+
+    p = sub.add_parser("history-trim", help="history size limit enforcement on a near-full history")
+    p.add_argument("--mb", type=float, default=100.0, help="history size")
+    p.add_argument("--text-chars", type=int, default=1000)
+    p.add_argument("--trim", type=int, nargs="+", default=[1, 10, 100, 1000])
+    p.add_argument("--max-legacy", type=int, default=10, help="skip the old enforcement above this count")
+    p.set_defaults(func=bench_history_trim)
+
+    p = sub.add_parser("history-query", help="history queries at 100k entries: journal vs SQLite backend")
+    p.add_argument("--entries", type=int, default=100000)
+    p.add_argument("--words", type=int, default=40)
+    p.set_defaults(func=bench_history_query)
+
+    p = sub.add_parser("history-menu", help="tray history menu open cost as the history grows")
+    p.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    p.add_argument("--text-chars", type=int, default=300)
+    p.set_defaults(func=bench_history_menu)
+
+    p = sub.add_parser("history-writer", help="history write cost on the dictation path: sync vs background writer")
+    p.add_argument("--entries", type=int, default=10000)
+    p.add_argument("--text-chars", type=int, default=300)
+    p.add_argument("--dictations", type=int, default=50)
+    p.add_argument("--interval-ms", type=int, default=20)
+    p.set_defaults(func=bench_history_writer)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,8 +6,14 @@ Gracefully degrades if pyannote is not installed.
 """
 import os
 import json
-from typing import Dict, List, Optional, Tuple
+import importlib
+import importlib.util
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
 
+import numpy as np
+
+import metrics
 from transcription_engine import TranscriptionSegment
 
 
@@ -16,17 +22,22 @@ def _get_config_path() -> str:
     return os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json")
 
 
-def is_available() -> bool:
-    """Check if pyannote-audio is installed"""
+def is_available(refresh: bool = False) -> bool:
+    """
+    Check if pyannote-audio is installed, without importing it (and torch).
+    A microsecond find_spec lookup; refresh=True rescans sys.path for a
+    package installed while the app is running.
+    """
+    if refresh:
+        importlib.invalidate_caches()
     try:
-        import pyannote.audio
-        return True
-    except ImportError:
+        return importlib.util.find_spec("pyannote.audio") is not None
+    except (ImportError, ValueError):
         return False
 
 
 def get_token() -> Optional[str]:
-    """Get HuggingFace token from config, env vars, or HfFolder"""
+    """Get HuggingFace token from config, env vars, or the huggingface-cli token file"""
     # 1. Check config.json
     try:
         with open(_get_config_path(), 'r') as f:
@@ -42,12 +53,16 @@ def get_token() -> Optional[str]:
     if token:
         return token
 
-    # 3. Check HuggingFace CLI stored token
+    # 3. Check HuggingFace CLI stored token (read directly: importing
+    #    huggingface_hub here would slow down opening the file window)
+    hf_home = os.environ.get("HF_HOME") or os.path.join(
+        os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "huggingface")
+    token_path = os.environ.get("HF_TOKEN_PATH") or os.path.join(hf_home, "token")
     try:
-        from huggingface_hub import HfFolder
-        token = HfFolder.get_token()
-        if token:
-            return token
+        with open(token_path, 'r') as f:
+            token = f.read().strip()
+            if token:
+                return token
     except Exception:
         pass
 
@@ -74,97 +89,298 @@ def save_token(token: str):
         json.dump(config, f, indent=2, ensure_ascii=False)
 
 
-class DiarizationManager:
-    """Speaker diarization using pyannote-audio"""
+# --- Process-wide pipeline cache ---
+# Loading the pyannote weights takes seconds, so the pipeline stays warm
+# across jobs and is dropped after DEFAULT_IDLE_TIMEOUT seconds unused.
 
-    def __init__(self, device: str = "cpu"):
-        self.device = device
-        self.pipeline = None
+DEFAULT_IDLE_TIMEOUT = 300.0
+
+_cache_lock = threading.Lock()
+_pipelines: Dict[str, object] = {}             # device -> loaded pipeline
+_in_use: Dict[str, int] = {}                   # device -> active diarize() calls
+_evict_timers: Dict[str, threading.Timer] = {}
+_run_locks: Dict[str, threading.Lock] = {}     # device -> one pipeline call at a time
+_loading: Dict[str, threading.Event] = {}      # device -> set when its load finished
+_idle_timeout = DEFAULT_IDLE_TIMEOUT
+
+
+def configure_cache(idle_timeout: float):
+    """Seconds a loaded pipeline is kept without use (0 = evict right away)"""
+    global _idle_timeout
+    _idle_timeout = float(idle_timeout)
 
-    def load_pipeline(self):
-        """Load pyannote speaker diarization pipeline"""
-        from pyannote.audio import Pipeline
+
+def _load_pipeline(device: str):
+    """Load pyannote speaker diarization pipeline"""
+    from pyannote.audio import Pipeline
+    import torch
+
+    token = get_token()
+
+    pipeline = Pipeline.from_pretrained(
+        "pyannote/speaker-diarization-3.1",
+        token=token,
+    )
+
+    if device == "cuda" and torch.cuda.is_available():
+        pipeline.to(torch.device("cuda"))
+    return pipeline
+
+
+def acquire_pipeline(device: str = "cpu"):
+    """
+    Cached pipeline for device (loaded on first use); pair with release_pipeline().
+    The load runs outside _cache_lock; concurrent callers for the same device
+    wait for it instead of loading twice.
+    """
+    while True:
+        with _cache_lock:
+            timer = _evict_timers.pop(device, None)
+            if timer:
+                timer.cancel()
+            pipeline = _pipelines.get(device)
+            if pipeline is not None:
+                metrics.increment("diarization.pipeline_hits")
+                _in_use[device] = _in_use.get(device, 0) + 1
+                return pipeline
+            loading = _loading.get(device)
+            if loading is None:
+                loading = _loading[device] = threading.Event()
+                break
+        loading.wait()  # then take the published pipeline, or retry a failed load
+
+    pipeline = None
+    try:
+        with metrics.span("diarization.pipeline_load"):
+            pipeline = _load_pipeline(device)
+        metrics.increment("diarization.pipeline_loads")
+    finally:
+        with _cache_lock:
+            del _loading[device]
+            if pipeline is not None:
+                _pipelines[device] = pipeline
+                _in_use[device] = _in_use.get(device, 0) + 1
+        loading.set()
+    return pipeline
+
+
+def release_pipeline(device: str = "cpu"):
+    """Mark one use as finished; the pipeline is evicted after the idle timeout"""
+    with _cache_lock:
+        _in_use[device] = max(_in_use.get(device, 0) - 1, 0)
+        if _in_use[device] == 0 and device in _pipelines:
+            timer = threading.Timer(_idle_timeout, _evict_if_idle, args=(device,))
+            timer.daemon = True
+            _evict_timers[device] = timer
+            timer.start()
+
+
+def _evict_if_idle(device: str):
+    with _cache_lock:
+        if _in_use.get(device, 0) or device not in _pipelines:
+            return
+        _evict_timers.pop(device, None)
+        del _pipelines[device]
+        metrics.increment("diarization.pipeline_evictions")
+    import gc
+    gc.collect()
+    if device == "cuda":
         import torch
+        torch.cuda.empty_cache()
 
-        token = get_token()
 
-        self.pipeline = Pipeline.from_pretrained(
-            "pyannote/speaker-diarization-3.1",
-            token=token,
-        )
+def preload_pipeline(device: str = "cpu") -> threading.Thread:
+    """Load the pipeline in the background (then idle-evicted like any other use)"""
+    def run():
+        try:
+            acquire_pipeline(device)
+            release_pipeline(device)
+        except Exception as e:
+            print(f"[WARNING] Diarization preload failed: {e}")
 
-        if self.device == "cuda" and torch.cuda.is_available():
-            self.pipeline.to(torch.device("cuda"))
+    thread = threading.Thread(target=run, daemon=True, name="diarization-preload")
+    thread.start()
+    return thread
 
-    def diarize(self, audio_path: str) -> Dict[Tuple[float, float], str]:
+
+class DiarizationCancelled(Exception):
+    """Raised by DiarizationManager.diarize() when should_stop() turned true"""
+
+
+class DiarizationManager:
+    """Speaker diarization using pyannote-audio (pipeline shared process-wide)"""
+
+    def __init__(self, device: str = "cpu"):
+        self.device = device
+
+    def diarize(self, audio_path: str,
+                should_stop: Callable[[], bool] = lambda: False) -> Dict[Tuple[float, float], str]:
         """
         Run speaker diarization on an audio file.
 
+        Calls into the shared pipeline are serialized per device. should_stop
+        is polled from the pipeline's progress hook (once per inference
+        batch); when it returns True the run is aborted with
+        DiarizationCancelled.
+
         Returns:
             Dict mapping (start, end) time tuples to speaker labels
         """
-        import tempfile
-        import subprocess
-
-        if not self.pipeline:
-            self.load_pipeline()
-
-        # Convert non-WAV files to WAV to avoid pyannote sample count issues
-        tmp_wav = None
-        ext = os.path.splitext(audio_path)[1].lower()
-        if ext != ".wav":
-            tmp_wav = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-            tmp_wav.close()
-            try:
-                subprocess.run(
-                    ["ffmpeg", "-y", "-i", audio_path, "-ar", "16000", "-ac", "1", tmp_wav.name],
-                    capture_output=True, timeout=120,
-                )
-                audio_path = tmp_wav.name
-            except Exception:
-                # If ffmpeg fails, try with original file anyway
-                pass
+        import torch
+        import audio_cache
 
+        def hook(*args, **kwargs):
+            if should_stop():
+                raise DiarizationCancelled()
+
+        with _cache_lock:
+            run_lock = _run_locks.setdefault(self.device, threading.Lock())
+        pipeline = acquire_pipeline(self.device)
         try:
-            output = self.pipeline(audio_path)
-            # pyannote 4.x returns DiarizeOutput, 3.x returns Annotation
-            if hasattr(output, 'speaker_diarization'):
-                diarization = output.speaker_diarization
-            else:
-                diarization = output
-            result = {}
-            for turn, _, speaker in diarization.itertracks(yield_label=True):
-                result[(turn.start, turn.end)] = speaker
-            return result
+            # In-memory waveform from the decode-once cache (no temp WAV conversion)
+            audio = audio_cache.get_audio(audio_path)
+            waveform = torch.from_numpy(audio).unsqueeze(0)
+            with run_lock:
+                hook()  # cancelled while waiting for another job
+                output = pipeline({"waveform": waveform, "sample_rate": audio_cache.SAMPLE_RATE},
+                                  hook=hook)
         finally:
-            if tmp_wav and os.path.exists(tmp_wav.name):
-                try:
-                    os.unlink(tmp_wav.name)
-                except Exception:
-                    pass
+            release_pipeline(self.device)
+        # pyannote 4.x returns DiarizeOutput, 3.x returns Annotation
+        if hasattr(output, 'speaker_diarization'):
+            diarization = output.speaker_diarization
+        else:
+            diarization = output
+        result = {}
+        for turn, _, speaker in diarization.itertracks(yield_label=True):
+            result[(turn.start, turn.end)] = speaker
+        return result
+
+
+class SpeakerIndex:
+    """
+    Diarization turns indexed per speaker: the union of each speaker's turns
+    as sorted start/end arrays with prefix sums of their lengths. The overlap
+    of any interval with a speaker is then two searchsorted lookups, so
+    labeling S intervals against T turns costs O((S + T) log T) per speaker
+    instead of O(S * T).
+    """
+
+    def __init__(self, diarization: Dict[Tuple[float, float], str]):
+        by_speaker: Dict[str, List[Tuple[float, float]]] = {}
+        for (start, end), speaker in diarization.items():
+            by_speaker.setdefault(speaker, []).append((start, end))
+
+        self.speakers = list(by_speaker)  # first appearance order breaks ties
+        self._tracks = []
+        for turns in by_speaker.values():
+            turns = np.array(sorted(turns), dtype=np.float64)
+            starts, ends = turns[:, 0], np.maximum.accumulate(turns[:, 1])
+            # Merge overlapping turns of the same speaker into disjoint spans
+            first = np.concatenate([[True], starts[1:] > ends[:-1]])
+            last = np.concatenate([first[1:], [True]])
+            starts, ends = starts[first], ends[last]
+            prefix = np.concatenate([[0.0], np.cumsum(ends - starts)])
+            self._tracks.append((starts, ends, prefix))
+
+    @staticmethod
+    def _coverage(track, x: np.ndarray) -> np.ndarray:
+        """Total speaker time before each x"""
+        starts, ends, prefix = track
+        idx = np.searchsorted(starts, x, side="right") - 1
+        safe = np.maximum(idx, 0)
+        covered = prefix[safe] + np.minimum(x, ends[safe]) - starts[safe]
+        return np.where(idx >= 0, covered, 0.0)
+
+    def overlaps(self, starts, ends) -> np.ndarray:
+        """Overlap seconds of each interval with each speaker, shape (intervals, speakers)"""
+        starts = np.asarray(starts, dtype=np.float64)
+        ends = np.asarray(ends, dtype=np.float64)
+        result = np.zeros((len(starts), len(self.speakers)))
+        for k, track in enumerate(self._tracks):
+            result[:, k] = self._coverage(track, ends) - self._coverage(track, starts)
+        return result
+
+    def assign(self, starts, ends) -> List[str]:
+        """Maximum-overlap speaker per interval ("" where no turn overlaps)"""
+        if not self.speakers or len(starts) == 0:
+            return [""] * len(starts)
+        overlap = self.overlaps(starts, ends)
+        best = overlap.argmax(axis=1)
+        has_overlap = overlap[np.arange(len(best)), best] > 0
+        return [self.speakers[b] if ok else "" for b, ok in zip(best, has_overlap)]
 
 
 def merge_speakers(
     segments: List[TranscriptionSegment],
-    diarization: Dict[Tuple[float, float], str],
+    diarization,
+    word_level: bool = False,
 ) -> List[TranscriptionSegment]:
     """
     Assign speaker labels to transcription segments based on temporal overlap.
-    Uses maximum overlap matching.
+    Uses maximum overlap matching per speaker.
+
+    Args:
+        segments: Transcription segments (labeled in place)
+        diarization: Dict of (start, end) -> speaker, or a prebuilt SpeakerIndex
+        word_level: Label each word and split segments where the speaker
+            changes (segments without word timestamps keep a single label)
     """
+    index = diarization if isinstance(diarization, SpeakerIndex) else SpeakerIndex(diarization)
+    labels = index.assign([seg.start for seg in segments], [seg.end for seg in segments])
+    for seg, label in zip(segments, labels):
+        seg.speaker = label
+    if not word_level:
+        return segments
+
+    words = [w for seg in segments for w in seg.words]
+    word_labels = iter(index.assign([w[0] for w in words], [w[1] for w in words]))
+    merged = []
     for seg in segments:
-        best_speaker = ""
-        best_overlap = 0.0
-
-        for (turn_start, turn_end), speaker in diarization.items():
-            overlap_start = max(seg.start, turn_start)
-            overlap_end = min(seg.end, turn_end)
-            overlap = max(0.0, overlap_end - overlap_start)
+        if not seg.words:
+            merged.append(seg)
+            continue
+        runs = []  # [speaker, [words]]
+        for word in seg.words:
+            # Words in a gap between turns stay with the current speaker
+            speaker = next(word_labels) or (runs[-1][0] if runs else seg.speaker)
+            if runs and runs[-1][0] == speaker:
+                runs[-1][1].append(word)
+            else:
+                runs.append([speaker, [word]])
+        for speaker, run in runs:
+            merged.append(TranscriptionSegment(
+                start=run[0][0], end=run[-1][1], speaker=speaker, words=run,
+                text="".join(w[2] for w in run).strip(),
+            ))
+    return merged
 
-            if overlap > best_overlap:
-                best_overlap = overlap
-                best_speaker = speaker
 
-        seg.speaker = best_speaker
+class IncrementalSpeakerMerge:
+    """
+    Speaker merge for a pipelined job where transcription segments and the
+    diarization result arrive independently, from different threads.
+    Each segment is labeled as soon as both sides are available.
+    """
 
-    return segments
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.index: Optional[SpeakerIndex] = None
+        self._pending: List[TranscriptionSegment] = []
+
+    def add_segment(self, segment: TranscriptionSegment) -> bool:
+        """Label the segment now if diarization is done (True), else keep it for later"""
+        with self._lock:
+            if self.index is None:
+                self._pending.append(segment)
+                return False
+            merge_speakers([segment], self.index)
+            return True
+
+    def set_diarization(self, diarization: Dict[Tuple[float, float], str]) -> List[TranscriptionSegment]:
+        """Store the diarization result, returns the segments labeled by it"""
+        index = SpeakerIndex(diarization)
+        with self._lock:
+            self.index = index
+            labeled, self._pending = self._pending, []
+            return merge_speakers(labeled, index)
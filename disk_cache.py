@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+WhisperRocket - Disk Cache
+Shared storage for the size-bounded caches in the config directory
+(decoded audio, transcription results): directory, size bound and
+least-recently-used eviction by file mtime.
+"""
+import os
+import threading
+from pathlib import Path
+from typing import Optional, Set
+
+
+class DiskCache:
+    """A cache directory of *suffix files, kept under max_mb by LRU eviction"""
+
+    def __init__(self, subdir: str, suffix: str, max_mb: int):
+        self.subdir = subdir
+        self.suffix = suffix
+        self.max_bytes = max_mb * 1024 * 1024
+        self._directory: Optional[Path] = None
+        self._lock = threading.Lock()
+
+    def configure(self, max_mb: Optional[int] = None, directory: Optional[Path] = None):
+        """Set the size bound (MB) and/or the cache directory"""
+        if max_mb is not None:
+            self.max_bytes = int(max_mb) * 1024 * 1024
+        if directory is not None:
+            self._directory = Path(directory)
+
+    def directory(self) -> Path:
+        if self._directory is None:
+            from platform_support import get_platform_handler
+            self._directory = get_platform_handler().get_config_dir() / self.subdir
+        self._directory.mkdir(parents=True, exist_ok=True)
+        return self._directory
+
+    def path(self, key: str) -> Path:
+        return self.directory() / f"{key}{self.suffix}"
+
+    @staticmethod
+    def touch(path: Path):
+        """Mark an entry as recently used"""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def evict(self, keep: Optional[Path] = None) -> Set[str]:
+        """
+        Delete least recently used entries until the directory fits the
+        bound. keep (the entry just written) is never deleted.
+
+        Returns:
+            Keys of the deleted entries
+        """
+        with self._lock:
+            files = []
+            for path in self.directory().glob(f"*{self.suffix}"):
+                try:
+                    st = path.stat()
+                    files.append((st.st_mtime, st.st_size, path))
+                except OSError:
+                    pass
+            total = sum(size for _, size, _ in files)
+            evicted = set()
+            for _, size, path in sorted(files):
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    path.unlink()
+                    total -= size
+                    evicted.add(path.name[:-len(self.suffix)])
+                except OSError:
+                    pass  # still mapped on Windows; retried next time
+            return evicted
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+WhisperRocket - Farm Worker
+Entry module of the transcription farm's worker processes. Spawned workers
+import this as their main module instead of whisper_gui, so they never load
+Qt, the audio stack or the CUDA path setup. Keep its imports light.
+"""
+import os
+
+
+def run(model_path: str, threads: int, compute_type: str, tasks, results):
+    """
+    Worker process main: load the model, then decode (index, audio, options)
+    shards from tasks until None, putting (index, segments) - or
+    (index, exception) - on results.
+    """
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    from faster_whisper import WhisperModel
+    from transcription_engine import segment_tuple
+    model = WhisperModel(model_path, device="cpu", compute_type=compute_type,
+                         cpu_threads=threads, num_workers=1)
+
+    for index, audio, options in iter(tasks.get, None):
+        try:
+            segments, _ = model.transcribe(audio, **options)
+            results.put((index, [segment_tuple(seg) for seg in segments]))
+        except Exception as e:
+            results.put((index, e))
@@ -21,6 +21,9 @@ from transcription_engine import (
     TranscriptionEngine, TranscriptionResult, TranscriptionSegment,
     format_timestamp, export_srt, export_vtt, export_txt, export_json,
 )
+from transcription_farm import farm_from_config
+import audio_cache
+import transcript_cache
 import diarization_manager
 
 
@@ -32,7 +35,10 @@ SUPPORTED_EXTENSIONS = {
 
 
 def get_audio_duration(file_path: str) -> float:
-    """Get audio duration in seconds using soundfile or ffprobe"""
+    """Get audio duration in seconds from the audio cache, soundfile or ffprobe"""
+    duration = audio_cache.cached_duration(file_path)
+    if duration is not None:
+        return duration
     try:
         import soundfile as sf
         info = sf.info(file_path)
@@ -130,20 +136,25 @@ class FileTranscriptionWindow(QMainWindow):
     segment_ready = Signal(object)
     transcription_complete = Signal(object)
     transcription_error = Signal(str)
+    speakers_updated = Signal()
 
-    def __init__(self, model, whisper_backend, config, ui_lang, model_lock):
+    def __init__(self, model, whisper_backend, config, ui_lang, model_lock, scheduler=None):
         super().__init__()
         self.model = model
         self.whisper_backend = whisper_backend
         self.config = config
         self.ui_lang = ui_lang
         self.model_lock = model_lock
+        self.scheduler = scheduler
+        audio_cache.configure(max_mb=config.get("audio_cache_mb", audio_cache.DEFAULT_MAX_MB))
+        transcript_cache.configure(max_mb=config.get("transcript_cache_mb", transcript_cache.DEFAULT_MAX_MB))
 
         self.engine = None
         self.result = None
         self.selected_file = None
         self.file_duration = 0.0
         self._transcribing = False
+        self._live_segments = []
 
         self.setWindowTitle(t("ft_title", ui_lang))
         self.setMinimumSize(600, 650)
@@ -152,6 +163,12 @@ class FileTranscriptionWindow(QMainWindow):
         self._setup_ui()
         self._connect_signals()
 
+        # Warm pyannote pipeline shared across jobs, loaded while the user picks a file
+        diarization_manager.configure_cache(
+            config.get("diarization_idle_timeout", diarization_manager.DEFAULT_IDLE_TIMEOUT))
+        if self.diarize_check.isChecked() and config.get("diarization_preload", True):
+            diarization_manager.preload_pipeline(config.get("device", "cpu"))
+
     def _setup_ui(self):
         central = QWidget()
         self.setCentralWidget(central)
@@ -282,6 +299,7 @@ class FileTranscriptionWindow(QMainWindow):
     def _connect_signals(self):
         self.progress_updated.connect(self._on_progress)
         self.segment_ready.connect(self._on_segment)
+        self.speakers_updated.connect(self._refresh_results)
         self.transcription_complete.connect(self._on_complete)
         self.transcription_error.connect(self._on_error)
 
@@ -299,6 +317,8 @@ class FileTranscriptionWindow(QMainWindow):
     def _load_file(self, file_path: str):
         self.selected_file = file_path
         self.file_duration = get_audio_duration(file_path)
+        # Decode while the user picks options; transcription and diarization reuse it
+        audio_cache.prefetch(file_path)
 
         name = os.path.basename(file_path)
         dur = format_duration(self.file_duration)
@@ -310,6 +330,7 @@ class FileTranscriptionWindow(QMainWindow):
 
         self.start_btn.setEnabled(True)
         self.results_text.clear()
+        self._live_segments = []
         self.result = None
         self.copy_btn.setEnabled(False)
         self.export_btn.setEnabled(False)
@@ -327,6 +348,7 @@ class FileTranscriptionWindow(QMainWindow):
 
         self._transcribing = True
         self.results_text.clear()
+        self._live_segments = []
         self.result = None
         self.start_btn.setEnabled(False)
         self.copy_btn.setEnabled(False)
@@ -336,54 +358,137 @@ class FileTranscriptionWindow(QMainWindow):
         self.progress_bar.setRange(0, 100)
         self.progress_label.setText("")
 
-        self.engine = TranscriptionEngine(self.model, self.whisper_backend, self.model_lock)
+        self.engine = TranscriptionEngine(
+            self.model, self.whisper_backend, self.model_lock, self.scheduler,
+            window_seconds=self.config.get("file_window_seconds", 30.0),
+            batch_size=self.config.get("file_batch_size", 0),
+            farm=farm_from_config(self.config) if self.whisper_backend == "faster-whisper" else None,
+        )
 
         thread = threading.Thread(target=self._transcription_worker, daemon=True)
         thread.start()
 
     def _transcription_worker(self):
         """Background worker for transcription + optional diarization"""
+        diar_thread = None
+        stop_diarization = threading.Event()
+        error = None
         try:
             language = self.lang_combo.currentData()
             vad = self.vad_check.isChecked()
-            do_diarize = self.diarize_check.isChecked() and self.diarize_check.isEnabled()
-
-            # Phase 1: Transcription
-            result = self.engine.transcribe_file(
-                file_path=self.selected_file,
+            do_diarize = (self.diarize_check.isChecked() and self.diarize_check.isEnabled()
+                          and diarization_manager.is_available())
+            word_level = do_diarize and self.config.get("diarization_word_level", False)
+
+            # Content hash for the cache keys (shared with the audio prefetch)
+            self.progress_updated.emit(0.0, t("ft_progress_reading", self.ui_lang))
+            content = audio_cache.content_key(self.selected_file)
+
+            # Speaker diarization runs in parallel with transcription;
+            # segments get their speaker as soon as both sides are done
+            merger = None
+            diar_errors = []
+            engine = self.engine
+            if do_diarize:
+                merger = diarization_manager.IncrementalSpeakerMerge()
+
+                def diarize():
+                    try:
+                        dia_key = transcript_cache.diarization_key(content)
+                        diarization = transcript_cache.load_diarization(dia_key)
+                        if diarization is None:
+                            dm = diarization_manager.DiarizationManager(
+                                device=self.config.get("device", "cpu")
+                            )
+                            # Cancel and errors reach pyannote through its progress hook
+                            diarization = dm.diarize(
+                                self.selected_file,
+                                should_stop=lambda: stop_diarization.is_set() or engine.is_cancelled)
+                            transcript_cache.store_diarization(dia_key, diarization)
+                        merger.set_diarization(diarization)
+                        self.speakers_updated.emit()
+                    except Exception as e:
+                        diar_errors.append(e)
+
+                diar_thread = threading.Thread(target=diarize, daemon=True)
+                diar_thread.start()
+
+            def on_segment(seg):
+                if merger:
+                    merger.add_segment(seg)
+                self.segment_ready.emit(seg)
+
+            # Same audio + same settings -> cached result, no Whisper pass
+            asr_key = transcript_cache.asr_key(
+                content,
+                backend=self.whisper_backend,
+                model=self.config.get("model"),
+                device=self.config.get("device"),
+                compute_type=self.config.get("compute_type"),
                 language=language,
-                vad_enabled=vad,
-                word_timestamps=False,
                 beam_size=5,
-                progress_callback=lambda p, s: self.progress_updated.emit(
-                    p * (0.80 if do_diarize else 1.0), s
-                ),
-                segment_callback=lambda seg: self.segment_ready.emit(seg),
+                vad=vad,
+                word_timestamps=word_level,
+                window_seconds=self.engine.window_seconds,
+                batch_size=self.engine.batch_size,
+                farm=self.engine.farm is not None,
             )
+            result = transcript_cache.load_asr(asr_key, self.selected_file)
+            if result is not None:
+                for seg in result.segments:
+                    on_segment(seg)
+                dur = format_timestamp(result.duration)
+                self.progress_updated.emit(0.95 if do_diarize else 1.0, f"{dur}/{dur}")
+            else:
+                self.progress_updated.emit(0.0, t("ft_progress_decoding", self.ui_lang))
+                result = self.engine.transcribe_file(
+                    file_path=self.selected_file,
+                    language=language,
+                    vad_enabled=vad,
+                    word_timestamps=word_level,
+                    beam_size=5,
+                    progress_callback=lambda p, s: self.progress_updated.emit(
+                        p * (0.95 if do_diarize else 1.0), s
+                    ),
+                    segment_callback=on_segment,
+                )
+
+                if not engine.is_cancelled:
+                    transcript_cache.store_asr(asr_key, result)
 
-            if self.engine.is_cancelled:
+            if do_diarize:
+                if diar_thread.is_alive() and not engine.is_cancelled:
+                    self.progress_updated.emit(0.95, t("ft_progress_diarization", self.ui_lang))
+                # Also on cancel: Start stays disabled until pyannote has stopped
+                diar_thread.join()
+            if engine.is_cancelled:
                 self.transcription_error.emit(t("ft_cancelled", self.ui_lang))
                 return
 
-            # Phase 2: Speaker diarization (optional)
-            if do_diarize and diarization_manager.is_available():
-                self.progress_updated.emit(0.80, t("ft_progress_diarization", self.ui_lang))
-
-                dm = diarization_manager.DiarizationManager(
-                    device=self.config.get("device", "cpu")
-                )
-                diar_result = dm.diarize(self.selected_file)
-                result.segments = diarization_manager.merge_speakers(result.segments, diar_result)
+            if do_diarize:
+                if diar_errors:
+                    raise diar_errors[0]
+                if word_level:
+                    # Split segments where the speaker changes mid-sentence
+                    result.segments = diarization_manager.merge_speakers(
+                        result.segments, merger.index, word_level=True)
                 result.has_diarization = True
 
             self.transcription_complete.emit(result)
 
         except Exception as e:
-            self.transcription_error.emit(str(e))
-
-    def _update_diarize_state(self):
-        """Update diarization checkbox based on current state"""
-        available = diarization_manager.is_available()
+            error = str(e)
+        finally:
+            # On every path pyannote has stopped before Start is enabled again
+            stop_diarization.set()
+            if diar_thread is not None:
+                diar_thread.join()
+        if error is not None:
+            self.transcription_error.emit(error)
+
+    def _update_diarize_state(self, refresh: bool = False):
+        """Update diarization checkbox based on current state (cheap: no pyannote import)"""
+        available = diarization_manager.is_available(refresh)
         has_tok = diarization_manager.has_token()
         ready = available and has_tok
         self.diarize_check.setEnabled(ready)
@@ -400,7 +505,7 @@ class FileTranscriptionWindow(QMainWindow):
         import webbrowser
         from PySide6.QtWidgets import QDialog, QVBoxLayout, QLabel, QLineEdit, QPushButton, QHBoxLayout
 
-        pyannote_installed = diarization_manager.is_available()
+        pyannote_installed = diarization_manager.is_available(refresh=True)
 
         dlg = QDialog(self)
         dlg.setWindowTitle(t("ft_diarization_setup_title", self.ui_lang))
@@ -499,7 +604,7 @@ class FileTranscriptionWindow(QMainWindow):
             tok = token_field.text().strip()
             if tok:
                 diarization_manager.save_token(tok)
-                self._update_diarize_state()
+                self._update_diarize_state(refresh=True)
                 if diarization_manager.is_available() and diarization_manager.has_token():
                     self.diarize_check.setChecked(True)
                 self.progress_label.setText(t("ft_diarization_token_saved", self.ui_lang))
@@ -532,10 +637,20 @@ class FileTranscriptionWindow(QMainWindow):
 
     @Slot(object)
     def _on_segment(self, seg: TranscriptionSegment):
+        self._live_segments.append(seg)
         ts = format_timestamp(seg.start)
         speaker = f" {seg.speaker}:" if seg.speaker else ""
         self.results_text.append(f"[{ts}]{speaker} {seg.text}")
 
+    @Slot()
+    def _refresh_results(self):
+        """Redraw the segments shown so far (speaker labels arrived)"""
+        self.results_text.clear()
+        for seg in self._live_segments:
+            ts = format_timestamp(seg.start)
+            speaker = f" {seg.speaker}:" if seg.speaker else ""
+            self.results_text.append(f"[{ts}]{speaker} {seg.text}")
+
     @Slot(object)
     def _on_complete(self, result: TranscriptionResult):
         self.result = result
@@ -551,11 +666,8 @@ class FileTranscriptionWindow(QMainWindow):
 
         # If diarization was done, refresh the text with speaker labels
         if result.has_diarization:
-            self.results_text.clear()
-            for seg in result.segments:
-                ts = format_timestamp(seg.start)
-                speaker = f" {seg.speaker}:" if seg.speaker else ""
-                self.results_text.append(f"[{ts}]{speaker} {seg.text}")
+            self._live_segments = result.segments
+            self._refresh_results()
 
     @Slot(str)
     def _on_error(self, error: str):
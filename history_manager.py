@@ -1,64 +1,366 @@
 """
 History Manager - Transzkripciók előzményeinek kezelése
+
+Tárolás: append-only napló (history.journal, soronként egy JSON rekord) és
+egy tömörített snapshot (history.json). Új bejegyzésnél csak egy sor kerül
+a napló végére; a snapshot-ot háttérszál építi újra, ha a napló megnőtt.
+A régi formátumú history.json egyszerűen 0. sorszámú snapshot-ként töltődik be.
+
+A journal backend bejegyzései memóriában is megvannak (folyamat-szintű cache):
+írásnál helyben frissül, más folyamat írását a fájlok mtime/méret/inode
+változása jelzi. Így a tray menü megnyitása nem parse-olja a fájlt.
+
+Opcionális SQLite backend (configure(backend="sqlite")): indexelt lekérdezések
+és FTS5 keresés; első használatkor átveszi a meglévő JSON history-t.
 """
 
 import json
 import os
+import re
+import threading
+import time
 import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple, Union
 
+import metrics
 from platform_support import get_platform_handler
 
 # Maximális history méret (100 MB)
 MAX_HISTORY_SIZE_BYTES = 100 * 1024 * 1024
 
+# Ekkora napló fölött a snapshot háttérben újraépül
+JOURNAL_COMPACT_BYTES = 1024 * 1024
+
+# Háttér író: ennyi még ki nem írt bejegyzés fölött az újak eldobódnak
+WRITE_QUEUE_SIZE = 256
+
+_directory: Optional[Path] = None
+_lock = threading.RLock()          # napló írás, rotálás, snapshot csere
+_compact_lock = threading.Lock()   # egyszerre egy tömörítés
+_compact_thread: Optional[threading.Thread] = None
+_last_seq: Optional[int] = None    # utolsó kiosztott napló sorszám
+_generation = 0                    # save_history()/clear_history() növeli
+
+BACKENDS = ("journal", "sqlite")
+_backend = "journal"
+_sqlite = None                     # SQLiteHistoryStore (lustán nyitva)
+
+# Journal cache: bejegyzések a legrégebbitől (append O(1)), ID index, fájl bélyeg
+_cache: Optional[List[Dict]] = None
+_cache_by_id: Dict[str, Dict] = {}
+_cache_stamp: Optional[tuple] = None
+
+# Háttér író: (bejegyzés, sorba állítás ideje) a legrégebbitől; kiírásig az
+# olvasó függvények is látják (az írás és a törlés innen _lock alatt történik)
+_unsaved: List[Tuple[Dict, float]] = []
+_unsaved_cond = threading.Condition()
+_writer_thread: Optional[threading.Thread] = None
+_dropping = False                  # tele sor: csak az első eldobásnál van figyelmeztetés
+
+def configure(directory: Optional[Path] = None, backend: str = "journal"):
+    """
+    History mappa és backend beállítása
+
+    Args:
+        directory: History mappa (alapértelmezés: a platform config mappája)
+        backend: "journal" (JSON napló + snapshot) vagy "sqlite"
+    """
+    global _directory, _last_seq, _backend, _sqlite, _cache
+    if backend not in BACKENDS:
+        print(f"[WARNING] Ismeretlen history backend: {backend}, journal használata")
+        backend = "journal"
+    with _lock:
+        if _sqlite is not None:
+            _sqlite.close()
+            _sqlite = None
+        _directory = Path(directory) if directory is not None else None
+        _last_seq = None
+        _backend = backend
+        _cache = None
+
+def _get_sqlite():
+    """SQLite store megnyitása; első alkalommal a JSON history importálása"""
+    global _sqlite
+    with _lock:
+        if _sqlite is None:
+            from history_sqlite import SQLiteHistoryStore
+            _sqlite = SQLiteHistoryStore(_get_dir() / "history.sqlite3")
+            if _sqlite.get_meta("json_imported") is None:
+                imported = _sqlite.add_many(reversed(_load_journal()["entries"]), MAX_HISTORY_SIZE_BYTES)
+                _sqlite.set_meta("json_imported", datetime.now().isoformat())
+                if imported:
+                    print(f"[INFO] {imported} history bejegyzés importálva SQLite-ba")
+        return _sqlite
+
+def _get_dir() -> Path:
+    directory = _directory
+    if directory is None:
+        directory = get_platform_handler().get_config_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
 def get_history_path() -> Path:
-    """History JSON fájl elérési útja (platform-specifikus)"""
-    platform_handler = get_platform_handler()
-    config_dir = platform_handler.get_config_dir()
-    config_dir.mkdir(parents=True, exist_ok=True)
-    return config_dir / "history.json"
+    """History snapshot (JSON) elérési útja (platform-specifikus)"""
+    return _get_dir() / "history.json"
 
-def load_history() -> Dict:
-    """History betöltése JSON fájlból"""
+def get_journal_path() -> Path:
+    """Append-only napló elérési útja"""
+    return _get_dir() / "history.journal"
+
+def _get_compacting_path() -> Path:
+    """Tömörítés alatt álló (rotált) napló"""
+    return _get_dir() / "history.journal.compacting"
+
+# --- Snapshot + napló olvasás ---
+
+def _read_snapshot() -> Tuple[int, List[Dict]]:
+    """(journal_seq, bejegyzések) a snapshot-ból; régi formátumnál a sorszám 0"""
     path = get_history_path()
     if not path.exists():
-        return {"entries": []}
-
+        return 0, []
     try:
         with open(path, "r", encoding="utf-8") as f:
             data = json.load(f)
-            if "entries" not in data:
-                data["entries"] = []
-            return data
-    except (json.JSONDecodeError, IOError):
-        return {"entries": []}
+        return int(data.get("journal_seq", 0)), data.get("entries", [])
+    except (json.JSONDecodeError, IOError, ValueError, AttributeError):
+        return 0, []
 
-def save_history(data: Dict) -> bool:
-    """History mentése JSON fájlba"""
+def _read_journal(path: Path, after_seq: int) -> List[Dict]:
+    """A napló after_seq utáni rekordjai"""
+    records = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # félbeszakadt utolsó sor (összeomlás írás közben)
+                if record.get("seq", 0) > after_seq:
+                    records.append(record)
+    except IOError:
+        pass
+    return records
+
+def _apply(entries: List[Dict], records: List[Dict]) -> List[Dict]:
+    """Napló rekordok alkalmazása (a lista legfrissebb elöl)"""
+    added = []
+    for record in records:
+        if record.get("op") == "clear":
+            entries, added = [], []
+        elif record.get("op") == "add":
+            added.append(record["entry"])
+    added.reverse()
+    return added + entries
+
+def _snapshot_seq() -> int:
+    """A snapshot journal_seq mezője a fájl elejéről (teljes beolvasás nélkül)"""
+    try:
+        with open(get_history_path(), "r", encoding="utf-8") as f:
+            match = re.match(r'\s*\{\s*"journal_seq":\s*(\d+)', f.read(64))
+        return int(match.group(1)) if match else 0
+    except IOError:
+        return 0
+
+def _tail_seq(path: Path) -> int:
+    """Az utolsó teljes napló sor sorszáma (csak a fájl végét olvassa)"""
+    try:
+        with open(path, "rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            f.seek(max(size - 65536, 0))
+            lines = f.read().splitlines()
+    except IOError:
+        return 0
+    for line in reversed(lines):
+        try:
+            return int(json.loads(line).get("seq", 0))
+        except (ValueError, AttributeError):
+            continue
+    records = _read_journal(path, -1) if size > 65536 else []
+    return records[-1].get("seq", 0) if records else 0
+
+def _terminate_torn_line(path: Path):
+    """Félbeszakadt utolsó sor lezárása, hogy a következő rekord új sorba kerüljön"""
+    try:
+        with open(path, "rb+") as f:
+            if f.seek(0, os.SEEK_END) == 0:
+                return
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+    except IOError:
+        pass
+
+def _next_seq() -> int:
+    global _last_seq
+    if _last_seq is None:
+        _terminate_torn_line(get_journal_path())
+        _last_seq = max(_snapshot_seq(), _tail_seq(_get_compacting_path()), _tail_seq(get_journal_path()))
+    _last_seq += 1
+    return _last_seq
+
+def load_history() -> Dict:
+    """Teljes history betöltése (legfrissebb elöl, a még ki nem írtakkal együtt)"""
+    with _lock:
+        if _backend == "sqlite":
+            return {"entries": _unsaved_entries() + _get_sqlite().recent(None)}
+        return {"entries": _unsaved_entries() + _cached_entries()[::-1]}
+
+def _load_journal() -> Dict:
+    """Snapshot + a napló még be nem olvasztott rekordjai"""
+    with _lock:
+        seq, entries = _read_snapshot()
+        records = _read_journal(_get_compacting_path(), seq) + _read_journal(get_journal_path(), seq)
+    return {"entries": _apply(entries, records)}
+
+# --- Memória cache ---
+
+def _stamp() -> tuple:
+    """A history fájlok (inode, mtime, méret) bélyege - bármilyen írás megváltoztatja"""
+    stamp = []
+    for path in (get_history_path(), _get_compacting_path(), get_journal_path()):
+        try:
+            st = path.stat()
+            stamp.append((st.st_ino, st.st_mtime_ns, st.st_size))
+        except OSError:
+            stamp.append(None)
+    return tuple(stamp)
+
+def _set_cache(entries: List[Dict], stamp: Optional[tuple] = None):
+    """Cache feltöltése (entries: a legrégebbitől); a hívó tartja a lock-ot"""
+    global _cache, _cache_by_id, _cache_stamp
+    _cache = entries
+    _cache_by_id = {entry.get("id"): entry for entry in entries}
+    _cache_stamp = stamp if stamp is not None else _stamp()
+
+def _cache_is_valid() -> bool:
+    return _cache is not None and _cache_stamp == _stamp()
+
+def _cached_entries() -> List[Dict]:
+    """Journal bejegyzések a legrégebbitől; csak akkor olvas fájlt, ha az változott"""
+    with _lock:
+        if not _cache_is_valid():
+            # A beolvasás előtti bélyeg: ha közben más folyamat ír, legközelebb újratölt
+            stamp = _stamp()
+            _set_cache(_load_journal()["entries"][::-1], stamp)
+        return _cache
+
+# --- Írás ---
+
+def _write_snapshot(seq: int, entries: List[Dict], encoded: Optional[List[str]] = None) -> bool:
+    """Snapshot atomikus cseréje (tmp + fsync + rename)"""
+    if encoded is None:
+        encoded = [_encode_entry(entry) for entry in entries]
     path = get_history_path()
+    tmp = path.with_name(path.name + ".tmp")
     try:
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        with open(tmp, "w", encoding="utf-8") as f:
+            # journal_seq elöl: _snapshot_seq() az első bájtokból olvassa
+            f.write('{"journal_seq": %d, "entries": [' % seq)
+            f.write(", ".join(encoded))
+            f.write("]}")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
         return True
     except IOError:
         return False
 
-def add_entry(text: str, duration_sec: float, language: str) -> Optional[str]:
-    """
-    Új bejegyzés hozzáadása a history-hoz
+def _append(records: List[Dict]) -> bool:
+    """Rekordok a napló végére - O(rekordok), egy fsync után tér vissza"""
+    data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode("utf-8")
+    try:
+        fd = os.open(get_journal_path(), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            os.write(fd, data)  # egyetlen O_APPEND write: a sorok egyben kerülnek a végére
+            os.fsync(fd)
+            size = os.fstat(fd).st_size
+        finally:
+            os.close(fd)
+    except OSError:
+        return False
+    if size >= JOURNAL_COMPACT_BYTES:
+        _compact_in_background()
+    return True
 
-    Returns:
-        Az új bejegyzés ID-ja, vagy None hiba esetén
+def compact() -> bool:
     """
-    if not text or not text.strip():
-        return None
+    Snapshot újraépítése: a napló rotálása után a régi snapshot és a rotált
+    napló összefésülése, méret limit, atomikus csere. A beolvasás és
+    szerializálás lock nélkül fut, így közben is lehet új bejegyzést írni.
+    """
+    global _cache_stamp
+    with _compact_lock:
+        with _lock:
+            journal, compacting = get_journal_path(), _get_compacting_path()
+            if journal.exists() and not compacting.exists():
+                cached = _cache_is_valid()
+                os.replace(journal, compacting)  # az új rekordok már friss naplóba mennek
+                if cached:
+                    _cache_stamp = _stamp()
+            generation = _generation
 
-    data = load_history()
+        seq, entries = _read_snapshot()
+        records = _read_journal(compacting, seq)
+        data = {"entries": _apply(entries, records)}
+        # Egyetlen szerializálás: a méret limit és a snapshot is ezt használja
+        encoded = [_encode_entry(entry) for entry in data["entries"]]
+        merged = len(encoded)
+        enforce_size_limit(data, encoded)
+        dropped = merged - len(encoded)
+        new_seq = max([seq] + [r.get("seq", 0) for r in records])
+
+        with _lock:
+            if generation != _generation:
+                return False  # közben felülírták / törölték a history-t
+            cached = _cache_is_valid()
+            if not _write_snapshot(new_seq, data["entries"], encoded):
+                return False
+            try:
+                compacting.unlink()
+            except FileNotFoundError:
+                pass
+            if cached:
+                # A limit a legrégebbieket dobta el: a cache elejéről ugyanennyi
+                for entry in _cache[:dropped]:
+                    _cache_by_id.pop(entry.get("id"), None)
+                del _cache[:dropped]
+                _cache_stamp = _stamp()
+        return True
+
+def _compact_in_background():
+    global _compact_thread
+    if _compact_thread is not None and _compact_thread.is_alive():
+        return
+    _compact_thread = threading.Thread(target=compact, daemon=True, name="history-compact")
+    _compact_thread.start()
+
+def save_history(data: Dict) -> bool:
+    """Teljes history felülírása (snapshot csere, a napló ürül)"""
+    global _generation
+    with _lock:
+        _generation += 1  # a háttér író a régi bejegyzéseit eldobja
+        with _unsaved_cond:
+            _unsaved.clear()
+            _unsaved_cond.notify_all()
+        if _backend == "sqlite":
+            store = _get_sqlite()
+            store.clear()
+            store.add_many(reversed(data.get("entries", [])), MAX_HISTORY_SIZE_BYTES)
+            return True
+        if not _write_snapshot(_next_seq(), data.get("entries", [])):
+            return False
+        for path in (get_journal_path(), _get_compacting_path()):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        _set_cache(list(reversed(data.get("entries", []))))
+        return True
 
-    entry = {
+def _new_entry(text: str, duration_sec: float, language: str) -> Dict:
+    return {
         "id": str(uuid.uuid4()),
         "timestamp": datetime.now().isoformat(),
         "text": text.strip(),
@@ -66,28 +368,184 @@ def add_entry(text: str, duration_sec: float, language: str) -> Optional[str]:
         "language": language
     }
 
-    # Új bejegyzés az elejére (legfrissebb elöl)
-    data["entries"].insert(0, entry)
+def _write_entries(entries: List[Dict]) -> bool:
+    """Bejegyzések tartós kiírása egy lépésben (a legrégebbitől); a hívó tartja a _lock-ot"""
+    global _cache_stamp
+    if _backend == "sqlite":
+        try:
+            _get_sqlite().add(entries, MAX_HISTORY_SIZE_BYTES)
+            return True
+        except Exception as e:
+            print(f"[HIBA] History mentés sikertelen: {e}")
+            return False
 
-    # Méret limit ellenőrzés
-    enforce_size_limit(data)
+    # A méret limitet a tömörítés érvényesíti
+    cached = _cache_is_valid()
+    if not _append([{"seq": _next_seq(), "op": "add", "entry": entry} for entry in entries]):
+        return False
+    if cached:
+        _cache.extend(entries)
+        _cache_by_id.update((entry["id"], entry) for entry in entries)
+        _cache_stamp = _stamp()
+    return True
 
-    if save_history(data):
-        return entry["id"]
+def add_entry(text: str, duration_sec: float, language: str) -> Optional[str]:
+    """
+    Új bejegyzés hozzáadása a history-hoz (szinkron, a kiírás után tér vissza)
+
+    Returns:
+        Az új bejegyzés ID-ja, vagy None hiba esetén
+    """
+    if not text or not text.strip():
+        return None
+
+    entry = _new_entry(text, duration_sec, language)
+    with _lock:
+        if _write_entries([entry]):
+            return entry["id"]
     return None
 
+# --- Háttér író ---
+
+def add_entry_async(text: str, duration_sec: float, language: str) -> Optional[str]:
+    """
+    Új bejegyzés a háttér író sorába - lemezre nem vár, soha nem blokkol
+
+    A bejegyzés azonnal látszik a get_recent()/get_entry_by_id()/get_stats()
+    eredményében. Ha a sor tele van (a lemez nem bírja), a bejegyzés eldobódik.
+
+    Returns:
+        Az új bejegyzés ID-ja, vagy None (üres szöveg / tele sor)
+    """
+    global _writer_thread, _dropping
+    if not text or not text.strip():
+        return None
+
+    entry = _new_entry(text, duration_sec, language)
+    with _unsaved_cond:
+        if len(_unsaved) >= WRITE_QUEUE_SIZE:
+            metrics.increment("history.dropped_writes")
+            if not _dropping:
+                print("[WARNING] History író sor megtelt, új bejegyzések eldobva")
+                _dropping = True
+            return None
+        _unsaved.append((entry, time.perf_counter()))
+        metrics.set_gauge("history.write_queue", len(_unsaved))
+        if _writer_thread is None or not _writer_thread.is_alive():
+            _writer_thread = threading.Thread(target=_writer_loop, daemon=True, name="history-writer")
+            _writer_thread.start()
+        _unsaved_cond.notify_all()
+    return entry["id"]
+
+def _writer_loop():
+    """A sorban összegyűlt bejegyzések kiírása egy tartós írásban (egy fsync / tranzakció)"""
+    global _dropping
+    while True:
+        with _unsaved_cond:
+            _unsaved_cond.wait_for(lambda: _unsaved)
+            batch = list(_unsaved)
+        with _lock:
+            with _unsaved_cond:
+                # Közben törölték/felülírták a history-t: a sor már üres
+                if not _unsaved or _unsaved[0] is not batch[0]:
+                    continue
+            ok = _write_entries([entry for entry, _ in batch])
+            with _unsaved_cond:
+                del _unsaved[:len(batch)]
+                _dropping = False
+                metrics.set_gauge("history.write_queue", len(_unsaved))
+                _unsaved_cond.notify_all()
+        now = time.perf_counter()
+        if ok:
+            metrics.increment("history.write_batches")
+            for _, queued_at in batch:
+                metrics.observe("history.write_lag", (now - queued_at) * 1000.0)
+        else:
+            metrics.increment("history.dropped_writes", len(batch))
+
+def flush(timeout: float = 5.0) -> bool:
+    """Várakozás, amíg a háttér író minden bejegyzést kiír (kilépéskor)"""
+    with _unsaved_cond:
+        return _unsaved_cond.wait_for(lambda: not _unsaved, timeout)
+
+def _unsaved_entries() -> List[Dict]:
+    """Még ki nem írt bejegyzések, legfrissebb elöl"""
+    with _unsaved_cond:
+        return [entry for entry, _ in reversed(_unsaved)]
+
 def get_recent(limit: int = 20) -> List[Dict]:
     """Legutóbbi N bejegyzés lekérése"""
-    data = load_history()
-    return data["entries"][:limit]
+    with _lock:
+        unsaved = _unsaved_entries()[:limit]
+        rest = limit - len(unsaved)
+        if rest <= 0:
+            return unsaved
+        if _backend == "sqlite":
+            return unsaved + _get_sqlite().recent(rest)
+        return unsaved + _cached_entries()[:-rest - 1:-1]
 
 def get_entry_by_id(entry_id: str) -> Optional[Dict]:
     """Egy bejegyzés lekérése ID alapján"""
-    data = load_history()
-    for entry in data["entries"]:
-        if entry.get("id") == entry_id:
-            return entry
-    return None
+    with _lock:
+        for entry in _unsaved_entries():
+            if entry.get("id") == entry_id:
+                return entry
+        if _backend == "sqlite":
+            return _get_sqlite().get(entry_id)
+        _cached_entries()
+        return _cache_by_id.get(entry_id)
+
+def search(query: str, limit: int = 50) -> List[Dict]:
+    """
+    Szabad szöveges keresés a bejegyzésekben (minden szónak szerepelnie kell)
+
+    SQLite backenden FTS5 (BM25 rangsor, az utolsó szó prefixként), a
+    journal backenden egyszerű részszöveg keresés találatszám szerint.
+    """
+    if _backend == "sqlite":
+        return _get_sqlite().search(query, limit)
+    terms = query.lower().split()
+    if not terms:
+        return []
+    hits = []
+    for entry in load_history()["entries"]:
+        text = entry.get("text", "").lower()
+        if all(term in text for term in terms):
+            hits.append((sum(text.count(term) for term in terms), entry))
+    hits.sort(key=lambda hit: -hit[0])  # stabil: azonos találatszámnál a frissebb elöl
+    return [entry for _, entry in hits[:limit]]
+
+def get_range(start: Union[datetime, str], end: Union[datetime, str],
+              limit: Optional[int] = None) -> List[Dict]:
+    """Bejegyzések start <= időpont < end között (legfrissebb elöl)"""
+    start = start.isoformat() if isinstance(start, datetime) else start
+    end = end.isoformat() if isinstance(end, datetime) else end
+    if _backend == "sqlite":
+        return _get_sqlite().range(start, end, limit)
+    entries = [e for e in load_history()["entries"] if start <= e.get("timestamp", "") < end]
+    return entries[:limit] if limit is not None else entries
+
+def import_json(path: Optional[Path] = None) -> int:
+    """
+    history.json importálása a SQLite backendbe (a már meglévő ID-k kimaradnak)
+
+    Args:
+        path: Importálandó fájl (régi vagy snapshot formátum);
+              None esetén a config mappa JSON history-ja (naplóval együtt)
+
+    Returns:
+        Az importált bejegyzések száma
+    """
+    if path is None:
+        entries = _load_journal()["entries"]
+    else:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entries = json.load(f).get("entries", [])
+        except (json.JSONDecodeError, IOError, AttributeError) as e:
+            print(f"[HIBA] History import sikertelen: {e}")
+            return 0
+    return _get_sqlite().add_many(reversed(entries), MAX_HISTORY_SIZE_BYTES)
 
 def clear_history() -> bool:
     """Teljes history törlése"""
@@ -100,15 +558,15 @@ def get_stats() -> Dict:
     Returns:
         {"count": int, "size_bytes": int, "size_formatted": str}
     """
-    path = get_history_path()
-    data = load_history()
-
-    count = len(data["entries"])
-
-    if path.exists():
-        size_bytes = path.stat().st_size
-    else:
-        size_bytes = 0
+    with _lock:
+        count = len(_unsaved_entries())
+        if _backend == "sqlite":
+            store = _get_sqlite()
+            count, size_bytes = count + store.count(), store.size_bytes()
+        else:
+            # A cache bélyegében már benne vannak a fájlméretek
+            count += len(_cached_entries())
+            size_bytes = sum(stamp[2] for stamp in _cache_stamp if stamp)
 
     # Méret formázás
     if size_bytes < 1024:
@@ -124,22 +582,35 @@ def get_stats() -> Dict:
         "size_formatted": size_formatted
     }
 
-def enforce_size_limit(data: Dict) -> None:
+def _encode_entry(entry: Dict) -> str:
+    return json.dumps(entry, ensure_ascii=False)
+
+def enforce_size_limit(data: Dict, encoded: Optional[List[str]] = None) -> None:
     """
     100 MB limit betartása - régi bejegyzések törlése ha szükséges
 
+    Minden bejegyzés kódolt mérete egyszer számolódik; a törlés a lista
+    végéről a futó összegből von le, újraszerializálás nélkül.
+
     Args:
         data: A history dict (helyben módosítja)
+        encoded: A bejegyzések kész JSON alakja, ha már megvan (helyben rövidül)
     """
-    # Ellenőrzés: JSON méret becslése
-    json_str = json.dumps(data, ensure_ascii=False)
-    current_size = len(json_str.encode("utf-8"))
+    entries = data["entries"]
+    if encoded is None:
+        encoded = [_encode_entry(entry) for entry in entries]
+    sizes = [len(text.encode("utf-8")) for text in encoded]
+
+    # {"entries": [...]} keret + ", " elválasztók a bejegyzések között
+    current_size = len('{"entries": []}') + sum(sizes) + 2 * max(len(sizes) - 1, 0)
 
-    # Ha túl nagy, töröljük a legrégebbi bejegyzéseket
-    while current_size > MAX_HISTORY_SIZE_BYTES and len(data["entries"]) > 0:
-        data["entries"].pop()  # Legrégebbi törlése (lista végéről)
-        json_str = json.dumps(data, ensure_ascii=False)
-        current_size = len(json_str.encode("utf-8"))
+    # Ha túl nagy, a legrégebbi bejegyzések törlése (lista végéről)
+    keep = len(entries)
+    while current_size > MAX_HISTORY_SIZE_BYTES and keep > 0:
+        keep -= 1
+        current_size -= sizes[keep] + (2 if keep > 0 else 0)
+    del entries[keep:]
+    del encoded[keep:]
 
 def format_timestamp(iso_timestamp: str) -> str:
     """ISO timestamp formázása olvasható formátumra (HH:MM:SS)"""
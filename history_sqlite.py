@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+WhisperRocket - SQLite History Store
+Optional history backend: a single SQLite database in WAL mode, indexed on
+id and timestamp, with an FTS5 full-text index over the transcribed text.
+"""
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    timestamp TEXT NOT NULL,
+    text TEXT NOT NULL,
+    duration_sec REAL,
+    language TEXT,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_timestamp ON entries(timestamp);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+# External-content FTS table kept in sync by triggers (text is stored once)
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(text, content='entries', content_rowid='seq');
+CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts(rowid, text) VALUES (new.seq, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN
+    INSERT INTO entries_fts(entries_fts, rowid, text) VALUES ('delete', old.seq, old.text);
+END;
+"""
+
+_SELECT = "SELECT e.id, e.timestamp, e.text, e.duration_sec, e.language FROM entries e"
+_NEWEST_FIRST = "ORDER BY e.timestamp DESC, e.seq DESC"
+
+
+def _entry_size(entry: Dict) -> int:
+    """Encoded JSON size plus separator, the same measure as the journal store"""
+    return len(json.dumps(entry, ensure_ascii=False).encode("utf-8")) + 2
+
+
+def _fts_query(query: str) -> str:
+    """User text as an FTS5 query: every word must match, the last one as a prefix"""
+    terms = ['"%s"' % term.replace('"', '""') for term in query.split()]
+    if terms:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+class SQLiteHistoryStore:
+    """History entries in SQLite; all calls are serialized on one connection"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")  # fsync every commit; writes are batched off the hot path
+        self._conn.executescript(_SCHEMA)
+        try:
+            self._conn.executescript(_FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            self.has_fts = False  # SQLite built without FTS5: search falls back to LIKE
+        self._total, self._count = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0), COUNT(*) FROM entries").fetchone()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # --- Writes ---
+
+    def add_many(self, entries: Iterable[Dict], max_bytes: int) -> int:
+        """Insert entries (oldest first), skipping known ids; returns the number added"""
+        rows = [(e["id"], e["timestamp"], e["text"], e.get("duration_sec"), e.get("language"),
+                 _entry_size(e)) for e in entries]
+        with self._lock, self._conn:
+            added = self._conn.executemany(
+                "INSERT OR IGNORE INTO entries (id, timestamp, text, duration_sec, language, size) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows).rowcount
+            if added:
+                self._total, self._count = self._conn.execute(
+                    "SELECT COALESCE(SUM(size), 0), COUNT(*) FROM entries").fetchone()
+            self._enforce_size_limit(max_bytes)
+        return added
+
+    def add(self, entries: List[Dict], max_bytes: int):
+        """Insert new entries (oldest first) in one transaction"""
+        rows = [(e["id"], e["timestamp"], e["text"], e.get("duration_sec"), e.get("language"),
+                 _entry_size(e)) for e in entries]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO entries (id, timestamp, text, duration_sec, language, size) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._total += sum(row[-1] for row in rows)
+            self._count += len(rows)
+            self._enforce_size_limit(max_bytes)
+
+    def _enforce_size_limit(self, max_bytes: int):
+        """Drop the oldest entries until the running total fits (caller holds the lock)"""
+        while self._total > max_bytes and self._count:
+            drop = []
+            for seq, size in self._conn.execute(
+                    "SELECT seq, size FROM entries ORDER BY timestamp, seq LIMIT 256"):
+                if self._total <= max_bytes:
+                    break
+                drop.append((seq,))
+                self._total -= size
+                self._count -= 1
+            self._conn.executemany("DELETE FROM entries WHERE seq = ?", drop)
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM entries")
+            self._total = self._count = 0
+
+    # --- Queries ---
+
+    def recent(self, limit: Optional[int] = 20) -> List[Dict]:
+        """Newest entries first (all of them when limit is None)"""
+        with self._lock:
+            rows = self._conn.execute(f"{_SELECT} {_NEWEST_FIRST} LIMIT ?",
+                                      (-1 if limit is None else limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def get(self, entry_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(f"{_SELECT} WHERE e.id = ?", (entry_id,)).fetchone()
+        return dict(row) if row else None
+
+    def search(self, query: str, limit: int = 50) -> List[Dict]:
+        """Full-text search, best match (BM25) first"""
+        if not query.split():
+            return []
+        with self._lock:
+            if self.has_fts:
+                rows = self._conn.execute(
+                    f"{_SELECT} JOIN entries_fts ON entries_fts.rowid = e.seq "
+                    "WHERE entries_fts MATCH ? ORDER BY entries_fts.rank LIMIT ?",
+                    (_fts_query(query), limit)).fetchall()
+            else:
+                pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                rows = self._conn.execute(
+                    f"{_SELECT} WHERE e.text LIKE ? ESCAPE '\\' {_NEWEST_FIRST} LIMIT ?",
+                    (pattern, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def range(self, start: str, end: str, limit: Optional[int] = None) -> List[Dict]:
+        """Entries with start <= timestamp < end (ISO strings), newest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"{_SELECT} WHERE e.timestamp >= ? AND e.timestamp < ? {_NEWEST_FIRST} LIMIT ?",
+                (start, end, -1 if limit is None else limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self) -> int:
+        return self._count
+
+    def size_bytes(self) -> int:
+        """Database plus WAL file size on disk"""
+        total = 0
+        for suffix in ("", "-wal"):
+            path = self.path.with_name(self.path.name + suffix)
+            if path.exists():
+                total += path.stat().st_size
+        return total
+
+    # --- Metadata ---
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+WhisperRocket - Inference Scheduler
+Priority queue with one long-lived worker per loaded model, so interactive
+dictations always run before file transcription jobs.
+"""
+import itertools
+import queue
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import metrics
+
+# Lower value = runs first
+PRIORITY_DICTATION = 0
+PRIORITY_FILE = 10
+
+_PRIORITY_NAMES = {PRIORITY_DICTATION: "dictation", PRIORITY_FILE: "file"}
+
+
+class JobCancelled(Exception):
+    """Raised by InferenceJob.wait() when the job was cancelled before it started"""
+
+
+class InferenceJob:
+    """Handle for a submitted model job"""
+
+    PENDING, RUNNING, DONE, CANCELLED = "pending", "running", "done", "cancelled"
+
+    def __init__(self, fn: Callable, priority: int, name: str):
+        self.fn = fn
+        self.priority = priority
+        self.name = name
+        self.submitted_at = time.perf_counter()
+        self.state = self.PENDING
+        self._state_lock = threading.Lock()
+        self._finished = threading.Event()
+        self._result = None
+        self._error: Optional[BaseException] = None
+
+    def cancel(self) -> bool:
+        """Cancel the job if it has not started yet. Returns True if cancelled."""
+        with self._state_lock:
+            if self.state != self.PENDING:
+                return False
+            self.state = self.CANCELLED
+        self._finished.set()
+        metrics.increment("scheduler.cancelled")
+        return True
+
+    @property
+    def cancelled(self) -> bool:
+        return self.state == self.CANCELLED
+
+    def wait(self, timeout: Optional[float] = None):
+        """Block until the job finished and return its result (re-raises its exception)"""
+        if not self._finished.wait(timeout):
+            raise TimeoutError(f"Inference job '{self.name}' did not finish in {timeout}s")
+        if self.state == self.CANCELLED:
+            raise JobCancelled(self.name)
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    def _start(self) -> bool:
+        with self._state_lock:
+            if self.state != self.PENDING:
+                return False
+            self.state = self.RUNNING
+            return True
+
+    def _finish(self, result=None, error: Optional[BaseException] = None):
+        self._result = result
+        self._error = error
+        self.state = self.DONE
+        self._finished.set()
+
+
+class InferenceScheduler:
+    """
+    Runs model jobs one at a time, lowest priority value first (FIFO within
+    a priority). The worker holds model_lock while a job runs, so code that
+    still uses the lock directly stays serialized with the queue.
+    """
+
+    def __init__(self, model_lock: threading.Lock, name: str = "inference"):
+        self.model_lock = model_lock
+        self.name = name
+        self._queue = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._pending: Dict[int, int] = {}  # priority -> queued job count
+        self._pending_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True, name=name)
+        self._thread.start()
+
+    def submit(self, fn: Callable, priority: int = PRIORITY_DICTATION, name: str = "job") -> InferenceJob:
+        """Queue fn() for the model worker"""
+        job = InferenceJob(fn, priority, name)
+        with self._pending_lock:
+            self._pending[priority] = self._pending.get(priority, 0) + 1
+        self._queue.put((priority, next(self._order), job))
+        metrics.set_gauge("scheduler.queue_depth", self._queue.qsize())
+        return job
+
+    def run(self, fn: Callable, priority: int = PRIORITY_DICTATION, name: str = "job"):
+        """Submit and wait for the result (runs inline when called from a job)"""
+        if threading.current_thread() is self._thread:
+            return fn()
+        return self.submit(fn, priority, name).wait()
+
+    def pending_count(self, max_priority: Optional[int] = None) -> int:
+        """Queued jobs (not yet running), optionally only those at or above a priority"""
+        with self._pending_lock:
+            return sum(n for p, n in self._pending.items() if max_priority is None or p <= max_priority)
+
+    def _run(self):
+        while True:
+            priority, _, job = self._queue.get()
+            with self._pending_lock:
+                self._pending[priority] -= 1
+            metrics.set_gauge("scheduler.queue_depth", self._queue.qsize())
+
+            if not job._start():
+                continue  # cancelled while queued
+
+            kind = _PRIORITY_NAMES.get(priority, str(priority))
+            metrics.observe(f"scheduler.wait_{kind}", (time.perf_counter() - job.submitted_at) * 1000)
+            try:
+                with self.model_lock, metrics.span(f"scheduler.run_{kind}"):
+                    result = job.fn()
+                job._finish(result=result)
+            except BaseException as e:
+                job._finish(error=e)
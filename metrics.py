@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+WhisperRocket - Metrics
+In-process latency registry with percentile reporting.
+Dumped to metrics.json / metrics.csv in the config directory.
+"""
+import csv
+import json
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+MAX_SAMPLES = 1000  # Most recent observations kept per histogram
+DUMP_INTERVAL = 60.0  # Seconds between periodic dumps
+
+
+class Histogram:
+    """Latency distribution over the most recent observations"""
+
+    def __init__(self, max_samples: int = MAX_SAMPLES):
+        self._samples = deque(maxlen=max_samples)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def observe(self, value: float):
+        self._samples.append(value)
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def summary(self) -> Dict[str, float]:
+        """count/mean/min/max over all observations, percentiles over the recent window"""
+        ordered = sorted(self._samples)
+
+        def percentile(p: float) -> float:
+            if not ordered:
+                return 0.0
+            # Nearest-rank percentile
+            rank = max(int(math.ceil(p / 100.0 * len(ordered))) - 1, 0)
+            return ordered[rank]
+
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "min": self.min if self.count else 0.0,
+            "max": self.max if self.count else 0.0,
+            "p50": percentile(50),
+            "p95": percentile(95),
+            "p99": percentile(99),
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe registry of histograms (ms), counters and gauges"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Histogram] = {}
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._version = 0  # bumped on every update, so an idle periodic dump is skipped
+
+    def observe(self, name: str, value_ms: float):
+        """Record one latency observation in milliseconds"""
+        with self._lock:
+            hist = self._histograms.get(name)
+            if hist is None:
+                hist = self._histograms[name] = Histogram()
+            hist.observe(value_ms)
+            self._version += 1
+
+    @contextmanager
+    def span(self, name: str):
+        """Time the enclosed block into histogram `name`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - start) * 1000.0)
+
+    def increment(self, name: str, amount: float = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+            self._version += 1
+
+    def set_gauge(self, name: str, value: float):
+        with self._lock:
+            self._gauges[name] = value
+            self._version += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "histograms_ms": {name: h.summary() for name, h in sorted(self._histograms.items())},
+                "counters": dict(sorted(self._counters.items())),
+                "gauges": dict(sorted(self._gauges.items())),
+            }
+
+    def dump(self, directory: Optional[Path] = None) -> bool:
+        """Write metrics.json and metrics.csv (default: config directory)"""
+        if directory is None:
+            from platform_support import get_platform_handler
+            directory = get_platform_handler().get_config_dir()
+        snap = self.snapshot()
+        snap["written_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            with open(directory / "metrics.json", "w", encoding="utf-8") as f:
+                json.dump(snap, f, indent=2)
+
+            fields = ["count", "mean", "min", "max", "p50", "p95", "p99"]
+            with open(directory / "metrics.csv", "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["name", "type"] + fields)
+                for name, summary in snap["histograms_ms"].items():
+                    writer.writerow([name, "histogram_ms"] + [round(summary[k], 3) for k in fields])
+                for name, value in snap["counters"].items():
+                    writer.writerow([name, "counter", value] + [""] * (len(fields) - 1))
+                for name, value in snap["gauges"].items():
+                    writer.writerow([name, "gauge", value] + [""] * (len(fields) - 1))
+            return True
+        except IOError as e:
+            print(f"[WARNING] Metrics dump failed: {e}")
+            return False
+
+    def start_periodic_dump(self, interval: float = DUMP_INTERVAL,
+                            directory: Optional[Path] = None) -> threading.Thread:
+        """Dump every interval seconds on a daemon thread (only when something changed)"""
+        def run():
+            dumped = self._version
+            while True:
+                time.sleep(interval)
+                if self._version != dumped:
+                    dumped = self._version
+                    self.dump(directory)
+
+        thread = threading.Thread(target=run, daemon=True, name="metrics-dump")
+        thread.start()
+        return thread
+
+
+# Process-wide registry
+registry = MetricsRegistry()
+observe = registry.observe
+span = registry.span
+increment = registry.increment
+set_gauge = registry.set_gauge
+snapshot = registry.snapshot
+dump = registry.dump
+start_periodic_dump = registry.start_periodic_dump
@@ -96,22 +96,42 @@ class LinuxHandler(PlatformHandler):
     def get_active_window_class(self) -> str:
         """Aktív ablak class nevének lekérdezése xdotool-lal"""
         try:
-            # Ablak neve
-            window_name = subprocess.run(
-                ['xdotool', 'getactivewindow', 'getwindowname'],
+            # Ablak neve és class-a egyetlen xdotool hívással (command chaining)
+            lines = subprocess.run(
+                ['xdotool', 'getactivewindow', 'getwindowname', 'getwindowclassname'],
                 capture_output=True, text=True
-            ).stdout.strip().lower()
-
-            # Ablak class
-            window_class = subprocess.run(
-                ['xdotool', 'getactivewindow', 'getwindowclassname'],
-                capture_output=True, text=True
-            ).stdout.strip().lower()
+            ).stdout.strip().lower().splitlines()
+            if not lines:
+                return ""
 
+            window_name = " ".join(lines[:-1])
+            window_class = lines[-1]
             return f"{window_name}|{window_class}"
         except Exception:
             return ""
 
+    def wait_for_clipboard(self, text: str, timeout: float = 0.3) -> bool:
+        """Vár, amíg a vágólap tényleg a szöveget adja vissza (fix sleep helyett)
+
+        Args:
+            text: A pyperclip.copy()-val beállított szöveg
+            timeout: Maximális várakozás másodpercben
+
+        Returns:
+            True ha megerősítve, False ha lejárt az idő
+        """
+        import pyperclip
+        deadline = time.perf_counter() + timeout
+        while True:
+            try:
+                if pyperclip.paste() == text:
+                    return True
+            except Exception:
+                pass
+            if time.perf_counter() >= deadline:
+                return False
+            time.sleep(0.005)
+
     def is_terminal_window(self, window_class: str) -> bool:
         """Ellenőrzi, hogy az ablak terminál vagy IDE-e (Ctrl+Shift+V használók)
 
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+WhisperRocket - Streaming Dictation
+Decodes closed segments in the background while recording, so that only
+the last few seconds are left to decode when the hotkey is released.
+"""
+import threading
+from typing import List, Tuple
+
+import numpy as np
+
+from audio_processing import WHISPER_SAMPLE_RATE, resample_audio
+from inference_scheduler import PRIORITY_DICTATION, JobCancelled
+
+
+# Commit policies: when is a decoded segment final?
+COMMIT_CLOSED_SEGMENTS = "closed_segments"   # every segment except the last (still open) one
+COMMIT_LOCAL_AGREEMENT = "local_agreement"   # segments reproduced by two consecutive passes
+COMMIT_POLICIES = (COMMIT_CLOSED_SEGMENTS, COMMIT_LOCAL_AGREEMENT)
+
+
+class StreamingTranscriber:
+    """
+    Sliding-window decoder running alongside the recording.
+
+    The audio callback feeds captured blocks with feed(). A background thread
+    decodes the uncommitted window every `interval` seconds and commits the
+    segments the policy considers final; committed audio is dropped from the
+    window. finish() decodes whatever is left and returns the full text.
+    """
+
+    def __init__(
+        self,
+        model,
+        scheduler,
+        language: str,
+        sample_rate: int,
+        beam_size: int = 5,
+        commit_policy: str = COMMIT_CLOSED_SEGMENTS,
+        interval: float = 1.0,
+        min_window: float = 2.0,
+        max_window: float = 25.0,
+        tail_guard: float = 1.0,
+    ):
+        """
+        Args:
+            model: Loaded faster-whisper model
+            scheduler: InferenceScheduler owning the model (passes run as dictation jobs)
+            language: Language code (e.g. "hu", "en")
+            sample_rate: Sample rate of the fed blocks
+            beam_size: Beam size for decoding
+            commit_policy: One of COMMIT_POLICIES
+            interval: Seconds between background passes
+            min_window: Don't decode windows shorter than this (seconds)
+            max_window: Force a commit when the window grows beyond this (seconds)
+            tail_guard: Segments ending closer than this to the live edge stay open (seconds)
+        """
+        if commit_policy not in COMMIT_POLICIES:
+            print(f"[WARNING] Unknown streaming commit policy '{commit_policy}', using {COMMIT_CLOSED_SEGMENTS}")
+            commit_policy = COMMIT_CLOSED_SEGMENTS
+
+        self.model = model
+        self.scheduler = scheduler
+        self.language = language
+        self.sample_rate = sample_rate
+        self.beam_size = beam_size
+        self.commit_policy = commit_policy
+        self.interval = interval
+        self.min_window = min_window
+        self.max_window = max_window
+        self.tail_guard = tail_guard
+
+        self._pending = []                   # fed blocks not yet moved into the window
+        self._pending_lock = threading.Lock()
+        self._window = np.zeros(0, dtype=np.float32)  # uncommitted audio (sample_rate)
+        self._committed: List[str] = []
+        self._previous: List[Tuple[float, float, str]] = []  # last pass, for local agreement
+        self._passes = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._job = None  # queued/running background pass
+
+    def start(self):
+        """Start the background decoding thread"""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def feed(self, block: np.ndarray):
+        """Queue a captured block (called from the audio callback, must stay cheap)"""
+        with self._pending_lock:
+            self._pending.append(block)
+
+    def finish(self) -> str:
+        """Stop background decoding, decode the remaining tail and return the full text"""
+        self._stop()
+        self._drain()
+        if len(self._window) > 0:
+            self._decode_pass(final=True)
+        print(f"[INFO] Streaming: {self._passes} passes, {len(self._committed)} segments")
+        return " ".join(self._committed)
+
+    def cancel(self):
+        """Stop background decoding and discard everything (does not wait for a running pass)"""
+        self._stop_event.set()
+        job = self._job
+        if job:
+            job.cancel()
+        with self._pending_lock:
+            self._pending = []
+
+    def _stop(self):
+        self._stop_event.set()
+        # A queued background pass would wait for the worker finish() may be running on
+        job = self._job
+        if job:
+            job.cancel()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _run(self):
+        """Background loop: decode the window every `interval` seconds"""
+        try:
+            while not self._stop_event.wait(self.interval):
+                self._drain()
+                if len(self._window) >= self.min_window * self.sample_rate:
+                    self._decode_pass(final=False)
+        except Exception as e:
+            # finish() still decodes the whole uncommitted window, nothing is lost
+            print(f"[WARNING] Streaming decode stopped: {e}")
+
+    def _drain(self):
+        """Move fed blocks into the window"""
+        with self._pending_lock:
+            blocks, self._pending = self._pending, []
+        if blocks:
+            new_audio = np.concatenate(blocks, axis=0).reshape(-1)
+            self._window = np.concatenate([self._window, new_audio])
+
+    def _decode_pass(self, final: bool):
+        """Decode the current window and commit the final segments"""
+        audio = resample_audio(self._window, self.sample_rate)
+        window_len = len(audio) / WHISPER_SAMPLE_RATE
+
+        # Previous text as prompt keeps wording consistent across windows
+        prompt = " ".join(self._committed[-3:]) or None
+
+        def decode():
+            segments_gen, _ = self.model.transcribe(
+                audio,
+                language=self.language,
+                beam_size=self.beam_size,
+                initial_prompt=prompt,
+            )
+            return [(seg.start, seg.end, seg.text.strip()) for seg in segments_gen]
+
+        if final:
+            segments = self.scheduler.run(decode, PRIORITY_DICTATION, "streaming")
+        else:
+            self._job = self.scheduler.submit(decode, PRIORITY_DICTATION, "streaming")
+            if self._stop_event.is_set():
+                self._job.cancel()  # _stop() may have looked before the job was assigned
+            try:
+                segments = self._job.wait()
+            except JobCancelled:
+                return
+            finally:
+                self._job = None
+        self._passes += 1
+
+        if final:
+            n_commit = len(segments)
+        else:
+            n_commit = self._count_committable(segments, window_len)
+            if n_commit == 0 and window_len > self.max_window:
+                # Window too long without a closed segment - bound the tail
+                n_commit = max(len(segments) - 1, 1) if segments else 0
+
+        if n_commit == 0:
+            self._previous = segments
+            return
+
+        self._committed.extend(text for _, _, text in segments[:n_commit] if text)
+        commit_time = segments[n_commit - 1][1]
+        cut = min(int(commit_time * self.sample_rate), len(self._window))
+        self._window = self._window[cut:]
+        self._previous = [(s - commit_time, e - commit_time, text) for s, e, text in segments[n_commit:]]
+
+    def _count_committable(self, segments, window_len: float) -> int:
+        """Number of leading segments the commit policy considers final"""
+        limit = window_len - self.tail_guard
+        n = 0
+        # The last segment is always open: speech may continue into it
+        for i, (start, end, text) in enumerate(segments[:-1]):
+            if end > limit:
+                break
+            if self.commit_policy == COMMIT_LOCAL_AGREEMENT:
+                if i >= len(self._previous):
+                    break
+                prev_start, _, prev_text = self._previous[i]
+                if prev_text != text or abs(prev_start - start) > 0.5:
+                    break
+            n = i + 1
+        return n
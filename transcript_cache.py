@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+WhisperRocket - Transcript Cache
+Persistent, content-addressed cache of file transcription results.
+ASR segments and diarization turns are stored separately, so toggling
+diarization on a file that was already transcribed does not re-run Whisper.
+"""
+import hashlib
+import json
+import os
+from typing import Dict, Optional, Tuple
+
+from disk_cache import DiskCache
+from transcription_engine import TranscriptionResult, TranscriptionSegment
+
+DEFAULT_MAX_MB = 100  # Size bound, least recently used entries evicted first
+DIARIZATION_MODEL = "pyannote/speaker-diarization-3.1"
+
+_cache = DiskCache("transcript_cache", ".json", DEFAULT_MAX_MB)
+
+configure = _cache.configure
+get_cache_dir = _cache.directory
+
+
+def asr_key(content_key: str, **settings) -> str:
+    """
+    Cache key for a transcription: audio content hash (audio_cache.content_key)
+    plus every setting that changes the output (model, compute type, language,
+    beam size, VAD, word timestamps, batching).
+    """
+    payload = json.dumps([content_key, sorted(settings.items())])
+    return "asr-" + hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def diarization_key(content_key: str) -> str:
+    payload = json.dumps([content_key, DIARIZATION_MODEL])
+    return "dia-" + hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+# --- Storage ---
+
+def _read(key: str) -> Optional[dict]:
+    path = _cache.path(key)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        _cache.touch(path)
+        return data
+    except (IOError, ValueError):
+        return None
+
+
+def _write(key: str, data: dict):
+    path = _cache.path(key)
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    except IOError as e:
+        print(f"[WARNING] Transcript cache write failed: {e}")
+        return
+    _cache.evict(keep=path)
+
+
+# --- Transcription results ---
+
+def load_asr(key: str, file_path: str) -> Optional[TranscriptionResult]:
+    """
+    Cached transcription (without speaker labels) for file_path, None on a miss.
+    The entry may come from an identical file under another name, so the
+    source name is always the current file's.
+    """
+    data = _read(key)
+    if data is None:
+        return None
+    segments = [
+        TranscriptionSegment(start=s["start"], end=s["end"], text=s["text"],
+                             words=[tuple(w) for w in s.get("words", [])])
+        for s in data["segments"]
+    ]
+    return TranscriptionResult(segments=segments, language=data["language"],
+                               duration=data["duration"], source_file=os.path.basename(file_path))
+
+
+def store_asr(key: str, result: TranscriptionResult):
+    segments = [{"start": s.start, "end": s.end, "text": s.text, "words": s.words}
+                for s in result.segments]
+    _write(key, {"language": result.language, "duration": result.duration,
+                 "source_file": result.source_file, "segments": segments})
+
+
+# --- Diarization ---
+
+def load_diarization(key: str) -> Optional[Dict[Tuple[float, float], str]]:
+    data = _read(key)
+    if data is None:
+        return None
+    return {(start, end): speaker for start, end, speaker in data["turns"]}
+
+
+def store_diarization(key: str, diarization: Dict[Tuple[float, float], str]):
+    _write(key, {"turns": [[start, end, speaker] for (start, end), speaker in diarization.items()]})
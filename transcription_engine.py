@@ -9,6 +9,11 @@ import threading
 from dataclasses import dataclass, field
 from typing import List, Optional, Callable
 
+from inference_scheduler import PRIORITY_FILE, JobCancelled
+
+WINDOW_SECONDS = 30.0     # Audio per file transcription job (one Whisper chunk)
+PROMPT_CHARS = 200        # Committed text carried into the next window as initial_prompt
+
 
 @dataclass
 class TranscriptionSegment:
@@ -17,6 +22,7 @@ class TranscriptionSegment:
     end: float = 0.0         # seconds
     text: str = ""
     speaker: str = ""        # e.g. "SPEAKER_00"
+    words: list = field(default_factory=list)  # [(start, end, word)] with word_timestamps
 
 
 @dataclass
@@ -29,14 +35,65 @@ class TranscriptionResult:
     has_diarization: bool = False
 
 
+def segment_tuple(seg) -> tuple:
+    """(start, end, text, words) of a faster-whisper segment, cheap to hold and pickle"""
+    words = [(w.start, w.end, w.word) for w in seg.words] if getattr(seg, "words", None) else []
+    return seg.start, seg.end, seg.text.strip(), words
+
+
 class TranscriptionEngine:
     """Handles file transcription with progress reporting"""
 
-    def __init__(self, model, whisper_backend: str, model_lock: threading.Lock):
+    def __init__(self, model, whisper_backend: str, model_lock: threading.Lock, scheduler=None,
+                 window_seconds: float = WINDOW_SECONDS, batch_size: int = 0, farm=None):
         self.model = model
         self.whisper_backend = whisper_backend
         self.model_lock = model_lock
+        self.scheduler = scheduler  # InferenceScheduler; dictations get priority over file jobs
+        self.window_seconds = window_seconds
+        self.batch_size = batch_size  # > 1: batched VAD-chunked decoding (faster-whisper)
+        self._batched = None
+        self.farm = farm  # TranscriptionFarm: decode on a CPU process pool instead of self.model
         self._cancel_flag = False
+        self._job = None
+
+    def _run_model(self, fn: Callable):
+        """
+        Run fn() with exclusive model access: as a file-priority scheduler job
+        when a scheduler is set, otherwise under model_lock.
+        Returns None if the job was cancelled before it started.
+        """
+        if self.scheduler is None:
+            with self.model_lock:
+                return fn()
+
+        self._job = self.scheduler.submit(fn, PRIORITY_FILE, "file")
+        if self._cancel_flag:
+            self._job.cancel()
+        try:
+            return self._job.wait()
+        except JobCancelled:
+            return None
+        finally:
+            self._job = None
+
+    def _batched_pipeline(self):
+        """faster-whisper's BatchedInferencePipeline around the model, or None if unavailable"""
+        if self._batched is None:
+            try:
+                from faster_whisper import BatchedInferencePipeline
+            except ImportError:
+                print("[WARNING] faster-whisper has no BatchedInferencePipeline (needs >= 1.1), "
+                      "using sequential decoding")
+                self.batch_size = 0
+                return None
+            self._batched = BatchedInferencePipeline(model=self.model)
+        return self._batched
+
+    def _load_audio(self, file_path: str):
+        """16 kHz mono float32 of the file from the decode-once cache (outside any model job)"""
+        import audio_cache
+        return audio_cache.get_audio(file_path)
 
     def transcribe_file(
         self,
@@ -68,6 +125,11 @@ class TranscriptionEngine:
 
         if self.whisper_backend == "mlx":
             return self._transcribe_mlx(file_path, language, result, progress_callback, segment_callback)
+        elif self.farm is not None:
+            return self._transcribe_farm(
+                file_path, language, vad_enabled, word_timestamps,
+                beam_size, result, progress_callback, segment_callback
+            )
         else:
             return self._transcribe_faster_whisper(
                 file_path, language, vad_enabled, word_timestamps,
@@ -78,40 +140,135 @@ class TranscriptionEngine:
         self, file_path, language, vad_enabled, word_timestamps,
         beam_size, result, progress_callback, segment_callback
     ):
-        """Transcribe using faster-whisper backend"""
-        # Acquire model lock and consume all segments
-        with self.model_lock:
-            segments_gen, info = self.model.transcribe(
-                file_path,
-                language=language,
-                beam_size=beam_size,
-                vad_filter=vad_enabled,
-                word_timestamps=word_timestamps,
-            )
-            result.duration = info.duration
-            raw_segments = list(segments_gen)
-
+        """
+        Transcribe using faster-whisper backend.
+
+        The audio is transcribed in windows of window_seconds, one model job
+        each, so a dictation queued meanwhile runs before the next window
+        instead of waiting for the whole file. Each window resumes from the
+        last committed timestamp.
+
+        Segments are committed to the result and reported as the generator
+        yields them; only the newest one is held back, because the window
+        edge may cut it off. It is redone in the next window only if it
+        starts in the second half of this one, so every window advances by
+        at least half its length.
+
+        With batch_size > 1 each window is batch_size times longer; the
+        batched pipeline splits it into VAD speech chunks and decodes them
+        in one batch, with timestamps already relative to the window.
+        Batching needs the VAD split (the pipeline rejects audio over 30 s
+        without clip timestamps), so with VAD off the file is decoded
+        sequentially.
+        """
+        batched = self._batched_pipeline() if self.batch_size > 1 and vad_enabled else None
+        audio = self._load_audio(file_path)
         if self._cancel_flag:
             return result
+        sample_rate = 16000
+        result.duration = len(audio) / sample_rate
+        window = int(self.window_seconds * (self.batch_size if batched else 1) * sample_rate)
 
-        # Process segments outside the lock
-        total = len(raw_segments)
-        for i, seg in enumerate(raw_segments):
-            if self._cancel_flag:
-                break
+        def report(position):
+            if progress_callback:
+                position = min(position, result.duration)
+                progress_callback(position / max(result.duration, 1e-9),
+                                  f"{format_timestamp(position)}/{format_timestamp(result.duration)}")
 
-            ts = TranscriptionSegment(
-                start=seg.start,
-                end=seg.end,
-                text=seg.text.strip(),
-            )
+        def commit(base, start, end, text, words):
+            ts = TranscriptionSegment(start=base + start, end=base + end, text=text,
+                                      words=[(base + ws, base + we, w) for ws, we, w in words])
             result.segments.append(ts)
-
             if segment_callback:
                 segment_callback(ts)
+            report(ts.end)
+
+        offset = 0  # first sample not yet committed
+        while offset < len(audio) and not self._cancel_flag:
+            chunk = audio[offset:offset + window]
+            base = offset / sample_rate
+            prompt = " ".join(seg.text for seg in result.segments[-5:])[-PROMPT_CHARS:] or None
+
+            def decode_window(chunk=chunk, base=base, prompt=prompt):
+                """Commit segments while decoding; returns (held back segment, segment count)"""
+                if batched:
+                    # Chunks in a batch are decoded independently, so no prompt
+                    segments_gen, _ = batched.transcribe(
+                        chunk,
+                        language=language,
+                        beam_size=beam_size,
+                        vad_filter=True,
+                        word_timestamps=word_timestamps,
+                        batch_size=self.batch_size,
+                    )
+                else:
+                    segments_gen, _ = self.model.transcribe(
+                        chunk,
+                        language=language,
+                        beam_size=beam_size,
+                        vad_filter=vad_enabled,
+                        word_timestamps=word_timestamps,
+                        initial_prompt=prompt,
+                    )
+                held, count = None, 0
+                for seg in segments_gen:
+                    if held is not None:
+                        commit(base, *held)
+                    held = segment_tuple(seg)
+                    count += 1
+                    if self._cancel_flag:
+                        break
+                return held, count
+
+            decoded = self._run_model(decode_window)
+            if decoded is None or self._cancel_flag:
+                break
+            held, count = decoded
+
+            window_end = base + len(chunk) / sample_rate
+            if held is None:
+                resume = window_end
+            elif count > 1 and window_end < result.duration and held[0] >= len(chunk) / sample_rate / 2:
+                # The last segment may be cut off by the window edge: redo it
+                resume = base + held[0]
+            else:
+                commit(base, *held)
+                resume = window_end
+
+            # Always move forward, even if a segment ends at the window start
+            offset = max(int(resume * sample_rate), offset + 1)
+            report(offset / sample_rate)
+
+        return result
+
+    def _transcribe_farm(
+        self, file_path, language, vad_enabled, word_timestamps,
+        beam_size, result, progress_callback, segment_callback
+    ):
+        """
+        Transcribe on the CPU process pool. The workers have their own
+        models, so this takes no scheduler jobs and dictation is unaffected
+        apart from CPU load.
+        """
+        audio = self._load_audio(file_path)
+        if self._cancel_flag:
+            return result
+        result.duration = len(audio) / 16000
+        options = dict(language=language, beam_size=beam_size,
+                       vad_filter=vad_enabled, word_timestamps=word_timestamps)
+
+        def on_shard(shard_start, shard_end, segments):
+            for start, end, text, words in segments:
+                ts = TranscriptionSegment(start=shard_start + start, end=shard_start + end, text=text,
+                                          words=[(shard_start + ws, shard_start + we, w) for ws, we, w in words])
+                result.segments.append(ts)
+                if segment_callback:
+                    segment_callback(ts)
             if progress_callback:
-                progress_callback((i + 1) / max(total, 1), f"{i + 1}/{total}")
+                progress_callback(shard_end / max(result.duration, 1e-9),
+                                  f"{format_timestamp(shard_end)}/{format_timestamp(result.duration)}")
 
+        self.farm.transcribe(audio, options, on_shard, lambda: self._cancel_flag)
         return result
 
     def _transcribe_mlx(self, file_path, language, result, progress_callback, segment_callback):
@@ -121,12 +278,13 @@ class TranscriptionEngine:
         if progress_callback:
             progress_callback(0.0, "Processing...")
 
-        with self.model_lock:
-            mlx_result = mlx_whisper.transcribe(
-                file_path,
-                path_or_hf_repo=f"mlx-community/whisper-{self.model['model_name']}-mlx",
-                language=language,
-            )
+        mlx_result = self._run_model(lambda: mlx_whisper.transcribe(
+            file_path,
+            path_or_hf_repo=f"mlx-community/whisper-{self.model['model_name']}-mlx",
+            language=language,
+        ))
+        if mlx_result is None:
+            return result
 
         segments_data = mlx_result.get("segments", [])
         result.duration = segments_data[-1]["end"] if segments_data else 0.0
@@ -150,8 +308,11 @@ class TranscriptionEngine:
         return result
 
     def cancel(self):
-        """Cancel ongoing transcription"""
+        """Cancel ongoing transcription (a still queued model job is dropped)"""
         self._cancel_flag = True
+        job = self._job
+        if job:
+            job.cancel()
 
     @property
     def is_cancelled(self):
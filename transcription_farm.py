@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+WhisperRocket - Transcription Farm
+Multi-process CPU file transcription: N worker processes, each with its own
+int8 model and a pinned thread count, decode silence-aligned shards in parallel.
+"""
+import multiprocessing
+import os
+import queue
+import sys
+from contextlib import contextmanager
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+import farm_worker
+
+SAMPLE_RATE = 16000
+SHARD_SECONDS = 120.0   # Target shard length (small enough to balance the workers)
+SEARCH_SECONDS = 10.0   # A cut may move this far from the target to land in a pause
+FRAME_SECONDS = 0.03    # Energy frame for the silence search
+RESERVED_CORES = 2      # Left free for the app itself (audio capture, dictation model)
+RAM_FRACTION = 0.6      # Share of physical RAM the workers may use
+CANCEL_POLL_SECONDS = 0.1
+
+# Approximate resident memory of one int8 CPU worker (model + runtime), in GB
+_WORKER_RAM_GB = {
+    "tiny": 0.3, "base": 0.4, "small": 0.8, "medium": 1.7, "turbo": 1.8, "large": 3.2,
+}
+
+
+def _worker_ram_gb(model_name: str) -> float:
+    for key, gb in _WORKER_RAM_GB.items():
+        if key in model_name:
+            return gb
+    return _WORKER_RAM_GB["large"]
+
+
+def total_ram_gb() -> Optional[float]:
+    """Physical RAM in GB, None if unknown (e.g. Windows)"""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 1024 ** 3
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def recommend_workers(model_name: str, cores: Optional[int] = None,
+                      ram_gb: Optional[float] = None) -> Tuple[int, int]:
+    """
+    Size the farm for this machine.
+
+    int8 decoding of a single stream stops scaling at about 4 threads, so
+    the free cores are split into 4-thread workers (2 on small machines),
+    and the worker count is capped by RAM (RAM_FRACTION of physical memory).
+
+    Returns:
+        (workers, threads_per_worker)
+    """
+    cores = cores or os.cpu_count() or 1
+    usable = max(cores - RESERVED_CORES, 1)
+    threads = 4 if usable >= 8 else 2 if usable >= 4 else usable
+    workers = max(usable // threads, 1)
+
+    ram_gb = total_ram_gb() if ram_gb is None else ram_gb
+    if ram_gb:
+        workers = max(min(workers, int(ram_gb * RAM_FRACTION / _worker_ram_gb(model_name))), 1)
+    return workers, threads
+
+
+def find_shards(audio: np.ndarray, shard_seconds: float = SHARD_SECONDS,
+                search_seconds: float = SEARCH_SECONDS) -> List[Tuple[int, int]]:
+    """
+    Split audio into ~shard_seconds pieces, cutting at the quietest point
+    within search_seconds of each target boundary.
+
+    Returns:
+        [(start_sample, end_sample), ...] covering the whole audio
+    """
+    frame = int(FRAME_SECONDS * SAMPLE_RATE)
+    n_frames = len(audio) // frame
+    target = int(shard_seconds / FRAME_SECONDS)
+    if n_frames < target * 1.5:
+        return [(0, len(audio))]
+
+    energy = np.square(audio[:n_frames * frame].reshape(n_frames, frame)).mean(axis=1)
+    # 300 ms smoothing: cut in a pause, not in the closure of a stop consonant
+    energy = np.convolve(energy, np.ones(10) / 10, mode="same")
+
+    search = int(search_seconds / FRAME_SECONDS)
+    cuts = [0]
+    while n_frames - cuts[-1] >= target * 1.5:
+        lo = cuts[-1] + target - search
+        hi = cuts[-1] + target + search
+        cuts.append(lo + int(np.argmin(energy[lo:hi])))
+
+    bounds = [c * frame for c in cuts] + [len(audio)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+# --- Worker processes ---
+
+@contextmanager
+def _spawn_main(module):
+    """
+    Present module as __main__ while worker processes start: a spawned
+    child re-imports the parent's main module, which would be the whole GUI.
+    """
+    main = sys.modules["__main__"]
+    sys.modules["__main__"] = module
+    try:
+        yield
+    finally:
+        sys.modules["__main__"] = main
+
+
+class TranscriptionFarm:
+    """CPU model processes for one file transcription at a time"""
+
+    def __init__(self, model_path: str, workers: int, threads: int,
+                 compute_type: str = "int8", shard_seconds: float = SHARD_SECONDS):
+        self.model_path = model_path
+        self.workers = workers
+        self.threads = threads
+        self.compute_type = compute_type
+        self.shard_seconds = shard_seconds
+
+    def transcribe(self, audio: np.ndarray, options: dict,
+                   on_shard: Callable[[float, float, list], None],
+                   should_stop: Callable[[], bool] = lambda: False) -> bool:
+        """
+        Transcribe 16 kHz audio; on_shard(start, end, segments) is called
+        in shard order with segment times relative to the shard start.
+
+        The processes live only for this call, so the models' RAM is
+        returned afterwards. They are all started up front and never
+        restarted: a worker that dies fails the transcription. Returns
+        False if stopped early.
+        """
+        shards = find_shards(audio, self.shard_seconds)
+        # spawn: forking a process with Qt and audio threads is not safe
+        ctx = multiprocessing.get_context("spawn")
+        tasks, results = ctx.Queue(), ctx.Queue()
+        workers = [
+            ctx.Process(target=farm_worker.run, name=f"farm-worker-{i}", daemon=True,
+                        args=(self.model_path, self.threads, self.compute_type, tasks, results))
+            for i in range(min(self.workers, len(shards)))
+        ]
+        for index, (start, end) in enumerate(shards):
+            tasks.put((index, audio[start:end], options))
+        for _ in workers:
+            tasks.put(None)
+
+        with _spawn_main(farm_worker):
+            for worker in workers:
+                worker.start()
+        try:
+            done = {}
+            for index, (start, end) in enumerate(shards):
+                # Poll, so a cancel terminates the workers mid-shard
+                while index not in done:
+                    if should_stop():
+                        return False
+                    try:
+                        shard_index, segments = results.get(timeout=CANCEL_POLL_SECONDS)
+                    except queue.Empty:
+                        for worker in workers:
+                            if worker.exitcode:
+                                raise RuntimeError(f"{worker.name} exited with code {worker.exitcode}")
+                        continue
+                    if isinstance(segments, Exception):
+                        raise segments
+                    done[shard_index] = segments
+                on_shard(start / SAMPLE_RATE, end / SAMPLE_RATE, done.pop(index))
+            return True
+        finally:
+            for worker in workers:
+                worker.terminate()
+            for worker in workers:
+                worker.join()
+            tasks.cancel_join_thread()  # shards never picked up after a cancel
+            tasks.close()
+            results.close()
+
+
+def farm_from_config(config: dict, model_name: Optional[str] = None) -> Optional[TranscriptionFarm]:
+    """
+    TranscriptionFarm for the configured model if file_farm_workers is set
+    ("auto" or a count) and the model runs on the CPU, otherwise None.
+    """
+    workers = config.get("file_farm_workers", 0)
+    if not workers or config.get("device") != "cpu":
+        return None
+
+    from model_manager import get_model_path_for_loading
+    model_name = model_name or config["model"]
+    auto_workers, auto_threads = recommend_workers(model_name)
+    if workers == "auto":
+        workers = auto_workers
+    threads = config.get("file_farm_threads", 0) or auto_threads
+    return TranscriptionFarm(get_model_path_for_loading(model_name, "cpu"), int(workers), int(threads))
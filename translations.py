@@ -158,8 +158,10 @@ TRANSLATIONS = {
         "ft_export_txt": "TXT (text with timestamps)",
         "ft_export_json": "JSON (structured)",
         "ft_close": "Close",
-        "ft_progress": "Processing: {current}/{total} segments...",
+        "ft_progress": "Processing: {current} / {total}...",
         "ft_progress_diarization": "Running speaker diarization...",
+        "ft_progress_reading": "Reading file...",
+        "ft_progress_decoding": "Decoding audio...",
         "ft_complete": "Transcription complete! ({segments} segments, {duration})",
         "ft_error": "Error: {error}",
         "ft_cancelled": "Transcription cancelled.",
@@ -339,8 +341,10 @@ TRANSLATIONS = {
         "ft_export_txt": "TXT (szöveg időbélyeggel)",
         "ft_export_json": "JSON (strukturált)",
         "ft_close": "Bezárás",
-        "ft_progress": "Feldolgozás: {current}/{total} szegmens...",
+        "ft_progress": "Feldolgozás: {current} / {total}...",
         "ft_progress_diarization": "Beszélő felismerés folyamatban...",
+        "ft_progress_reading": "Fájl beolvasása...",
+        "ft_progress_decoding": "Hang dekódolása...",
         "ft_complete": "Átírás kész! ({segments} szegmens, {duration})",
         "ft_error": "Hiba: {error}",
         "ft_cancelled": "Átírás megszakítva.",
@@ -2,11 +2,17 @@
 import os
 import sys
 import json
-import tempfile
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from queue import Queue
 
+# Frozen build: spawned farm worker processes re-run this script - hand them
+# to multiprocessing BEFORE Qt imports (no tray, hotkey or model in a worker)
+if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()
+
 # Check for --uninstall flag BEFORE Qt imports
 if "--uninstall" in sys.argv:
     from appimage_uninstall import run_uninstall
@@ -14,7 +20,6 @@ if "--uninstall" in sys.argv:
     sys.exit(0)
 
 import sounddevice as sd
-import soundfile as sf
 import pyperclip
 from pynput import keyboard
 from platform_support.keyboard_listener import create_keyboard_listener, get_session_type
@@ -84,6 +89,11 @@ class TrayIconUpdater(QObject):
 
 from translations import t, TRANSLATIONS
 import history_manager
+import metrics
+from inference_scheduler import InferenceScheduler, PRIORITY_DICTATION
+from audio_processing import (
+    WHISPER_SAMPLE_RATE, AudioRecorder, PreRollBuffer, StreamingResampler, resample_audio,
+)
 from functools import partial
 
 # Konfiguráció (bundled app-ban user könyvtárba mentjük)
@@ -150,12 +160,16 @@ config = load_config()
 ui_lang = config.get("ui_language", "en")
 model = None
 recording = False
-audio_data = []
+recorder = None  # AudioRecorder (main()-ben jön létre a tényleges sample rate-tel)
+preroll = None  # PreRollBuffer - az utolsó N ms mindig megvan (első szótag ne vesszen el)
+resampler = None  # StreamingResampler - felvétel közben 16 kHz-re alakít a callback szálban
+preroll_pending = False  # Az új felvétel első blokkja előtt a pre-roll-t is be kell írni
 stream = None
 tray_icon = None
 hotkey_pressed = {}
 actual_sample_rate = config.get("sample_rate", 16000)  # Tényleges sample rate
 keyboard_listener = None  # pynput keyboard listener
+streaming_transcriber = None  # Streaming dictation decoder (felvétel közben)
 
 # Popup ablak változók
 amplitude_queue = Queue(maxsize=100)  # Thread-safe queue a waveform adatokhoz
@@ -168,6 +182,11 @@ settings_window_instance = None  # Settings ablak (közvetlen megnyitáshoz)
 file_transcription_window_instance = None  # File transcription ablak
 history_viewers = []  # Aktív history viewer ablakok
 model_lock = threading.Lock()  # Lock for concurrent model access
+inference_scheduler = None  # InferenceScheduler - egyetlen modell worker, diktálás elsőbbséggel
+model_warm = False  # Lefutott-e a warm-up a betöltött modellen
+first_dictation_done = False  # Első diktálás latency mérése (cold vs warm)
+paste_executor = ThreadPoolExecutor(max_workers=1)  # Aktív ablak detektálás a dekódolással párhuzamosan
+dictation_tail_executor = ThreadPoolExecutor(max_workers=1)  # Paste + könyvelés sorrendben, a modell worker-en kívül
 
 # Hang lejátszás (platform-független)
 def play_sound(sound_file):
@@ -243,6 +262,13 @@ def quit_app():
     except:
         pass
 
+    # Függőben lévő history bejegyzések kiírása
+    if not history_manager.flush():
+        print("[WARNING] History writer did not finish in time")
+
+    # Metrikák mentése
+    metrics.dump()
+
     # Stop audio stream
     if stream:
         try:
@@ -285,6 +311,7 @@ def open_file_transcription():
             config=config,
             ui_lang=ui_lang,
             model_lock=model_lock,
+            scheduler=inference_scheduler,
         )
         file_transcription_window_instance.show()
     else:
@@ -372,9 +399,25 @@ def refresh_history_menu():
         import traceback
         traceback.print_exc()
 
+def warm_up_model():
+    """
+    Rövid szintetikus klip átírása a betöltés után, hogy az első diktálás ne
+    fizesse a kernel inicializálást, allokátor növekedést és tokenizer setupot.
+
+    Returns:
+        A warm-up időtartama másodpercben
+    """
+    # 1 s halk zaj - a dekóder is lefut rajta, nem csak az encoder
+    clip = (np.random.default_rng(0).standard_normal(WHISPER_SAMPLE_RATE) * 0.01).astype(np.float32)
+    start_time = time.time()
+    inference_scheduler.run(partial(transcribe_audio, clip), PRIORITY_DICTATION, "warmup")
+    elapsed = time.time() - start_time
+    metrics.observe("model.warmup", elapsed * 1000)
+    return elapsed
+
 # Modell betöltés
 def load_model():
-    global model
+    global model, model_warm, inference_scheduler
     print("[INFO] Whisper modell betoltese...")
     sys.stdout.flush()
     update_icon('orange', t("tray_loading", ui_lang))
@@ -398,6 +441,18 @@ def load_model():
             )
         print("[INFO] Modell betoltve!")
         sys.stdout.flush()
+
+        # Egy hosszú életű worker a modellhez (diktálás > fájl átírás)
+        inference_scheduler = InferenceScheduler(model_lock)
+
+        # Warm-up: a tray csak utána lesz "ready" (kék)
+        if config.get("model_warmup", True):
+            try:
+                print(f"[INFO] Model warm-up: {warm_up_model():.2f}s")
+                model_warm = True
+            except Exception as e:
+                print(f"[WARNING] Model warm-up failed: {e}")
+            sys.stdout.flush()
         update_icon('blue', t("tray_ready", ui_lang))
     except Exception as e:
         print(f"[HIBA] Modell betoltes: {e}")
@@ -406,84 +461,167 @@ def load_model():
 
 # Audio callback
 def audio_callback(indata, frames, time_info, status):
-    if recording:
-        audio_data.append(indata.copy())
-        # Amplitude számítás a waveform vizualizációhoz
-        amplitude = np.abs(indata).mean()
-        try:
-            amplitude_queue.put_nowait(amplitude)
-        except:
-            pass  # Queue tele - nem gond, csak vizualizáció
+    global preroll_pending
+    if not recording:
+        preroll.write(indata)
+        return
+
+    streamer = streaming_transcriber
+    if preroll_pending:
+        # Felvétel eleje: pre-roll beírása (a callback szálban, így nincs rés)
+        preroll_pending = False
+        resampler.reset()
+        seed = recorder.write(resampler.process(preroll.snapshot()))
+        preroll.clear()
+        if streamer:
+            streamer.feed(seed)
+
+    # 16 kHz mono már a callback-ben - 3x kevesebb memória, nincs resample a release után
+    block = recorder.write(resampler.process(indata))
+    if streamer:
+        streamer.feed(block)
+    # Amplitude számítás a waveform vizualizációhoz
+    amplitude = np.abs(indata).mean()
+    try:
+        amplitude_queue.put_nowait(amplitude)
+    except:
+        pass  # Queue tele - nem gond, csak vizualizáció
+
+def transcribe_audio(audio):
+    """
+    16 kHz mono float32 audio átírása a betöltött modellel (fájl nélkül), a teljes szöveggel tér vissza.
+    Az inference worker-en fut (a model_lock-ot a scheduler tartja).
+    """
+    if whisper_backend == "mlx":
+        # MLX backend
+        import mlx_whisper
+        result = mlx_whisper.transcribe(
+            audio,
+            path_or_hf_repo=f"mlx-community/whisper-{model['model_name']}-mlx",
+            language=config["language"]
+        )
+        return result.get("text", "").strip()
 
-# Feldolgozás
-def process_audio(audio_copy):
+    # Faster-whisper backend
+    segments, info = model.transcribe(
+        audio,
+        language=config["language"],
+        beam_size=5
+    )
+    # Szöveg összegyűjtés
+    return " ".join([segment.text.strip() for segment in segments])
+
+def reset_icon_later(delay, hide=False):
+    """Ikon visszaállítása késleltetéssel (az inference worker-t nem blokkolja)"""
+    def _reset():
+        if hide:
+            hide_popup()
+        update_icon('blue', t("tray_ready", ui_lang))
+    timer = threading.Timer(delay, _reset)
+    timer.daemon = True
+    timer.start()
+
+def detect_terminal_window():
+    """Aktív ablak terminál-e (stop-kor indul, a dekódolással párhuzamosan fut)"""
+    with metrics.span("dictation.active_window"):
+        window_class = platform_handler.get_active_window_class()
+    return platform_handler.is_terminal_window(window_class)
+
+def wait_for_paste_ready(text, timeout=0.3):
+    """Beillesztés előtti várakozás fix sleep helyett: vágólap megerősítése és a hotkey modifier-ek felengedése"""
+    if not hasattr(platform_handler, 'wait_for_clipboard'):
+        time.sleep(timeout)
+        return
+    deadline = time.perf_counter() + timeout
+    platform_handler.wait_for_clipboard(text, timeout)
+    # Ctrl+V ne menjen ki, amíg a hotkey modifier-ei (pl. Alt) még le vannak nyomva
+    while any(hotkey_pressed.get(mod, False) for mod in ('ctrl', 'alt', 'shift', 'cmd')):
+        if time.perf_counter() >= deadline:
+            break
+        time.sleep(0.005)
+
+# Dekódolás (diktálás job - az inference worker-en fut, csak a modell munka)
+def decode_dictation(audio_array, streamer=None):
+    """Diktálás dekódolása; (szöveg, eltelt idő, dekódolás vége) a visszatérési érték"""
+    global first_dictation_done
     print("\n" + "="*60)
     print("[PROCESSING] Starting...")
 
-    try:
-        # Audio concatenation
-        audio_array = np.concatenate(audio_copy, axis=0)
-        print(f"[INFO] Audio length: {len(audio_array)/actual_sample_rate:.2f}s")
+    print(f"[INFO] Audio length: {len(audio_array)/recorder.sample_rate:.2f}s")
+    print(f"[INFO] Recorder high-water mark: {recorder.high_water_bytes / (1024 * 1024):.1f} MB")
+    metrics.set_gauge("recorder.high_water_bytes", recorder.high_water_bytes)
+    metrics.observe("dictation.audio_length", len(audio_array) / recorder.sample_rate * 1000)
+
+    start_time = time.time()
 
-        # Temp file (Whisper auto-resamples)
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
-        sf.write(temp_file.name, audio_array, actual_sample_rate)
+    if streamer is not None:
+        # Streaming mode - only the uncommitted tail is left to decode
+        print("[INFO] Whisper processing (streaming tail)...")
+        with metrics.span("dictation.decode"):
+            text = streamer.finish()
+    else:
+        # Already 16 kHz from the capture-side resampler (no-op then) - no temp WAV, no second decode
+        with metrics.span("dictation.resample"):
+            audio_16k = resample_audio(audio_array, recorder.sample_rate)
 
         # Whisper transcribe
         print("[INFO] Whisper processing...")
-        start_time = time.time()
-
-        with model_lock:
-            if whisper_backend == "mlx":
-                # MLX backend
-                import mlx_whisper
-                result = mlx_whisper.transcribe(
-                    temp_file.name,
-                    path_or_hf_repo=f"mlx-community/whisper-{model['model_name']}-mlx",
-                    language=config["language"]
-                )
-                text = result.get("text", "").strip()
-            else:
-                # Faster-whisper backend
-                segments, info = model.transcribe(
-                    temp_file.name,
-                    language=config["language"],
-                    beam_size=5
-                )
-                # Szöveg összegyűjtés
-                text = " ".join([segment.text.strip() for segment in segments])
-        
-        elapsed = time.time() - start_time
-        
+        with metrics.span("dictation.decode"):
+            text = transcribe_audio(audio_16k)
+
+    elapsed = time.time() - start_time
+    decode_done = time.perf_counter()
+
+    # Első diktálás: cold/warm latency rögzítése (a warm-up hatásának ellenőrzéséhez)
+    if not first_dictation_done:
+        first_dictation_done = True
+        print(f"[INFO] First dictation decode ({'warm' if model_warm else 'cold'} model): {elapsed:.2f}s")
+        metrics.observe(f"dictation.first_decode_{'warm' if model_warm else 'cold'}", elapsed * 1000)
+
+    return text, elapsed, decode_done
+
+# Feldolgozás vége (saját szálon: paste, history, popup - a modell közben már szabad)
+def process_audio(job, stop_time=None, window_future=None):
+    try:
+        text, elapsed, decode_done = job.wait()
+
         # Vágólapra másolás
-        pyperclip.copy(text)
+        with metrics.span("dictation.clipboard_copy"):
+            pyperclip.copy(text)
         # Auto-paste (platform-independent)
         try:
             print("[INFO] Auto-pasting...")
-            time.sleep(0.3)
+            with metrics.span("dictation.paste_wait"):
+                wait_for_paste_ready(text)
 
-            # Active window detection
-            window_class = platform_handler.get_active_window_class()
-            is_terminal = platform_handler.is_terminal_window(window_class)
+            # Active window detection (stop-kor indult, általában már kész)
+            if window_future is not None:
+                is_terminal = window_future.result(timeout=2)
+            else:
+                is_terminal = detect_terminal_window()
 
             # Paste (different key combo for terminals)
-            platform_handler.paste_text(is_terminal=is_terminal)
+            with metrics.span("dictation.paste"):
+                platform_handler.paste_text(is_terminal=is_terminal)
+            metrics.observe("dictation.decode_to_paste", (time.perf_counter() - decode_done) * 1000)
             print(f"[INFO] Pasted!")
         except Exception as e:
             print(f"[WARNING] Paste failed: {e}")
         print("="*60)
         print(f"RESULT: '{text}'")
         print(f"TIME: {elapsed:.2f}s")
+        if stop_time is not None:
+            stop_to_paste = time.perf_counter() - stop_time
+            metrics.observe("dictation.stop_to_paste", stop_to_paste * 1000)
+            print(f"STOP-TO-PASTE: {stop_to_paste:.2f}s")
         print("="*60)
         print(">>> CLIPBOARD: Press Ctrl+V to paste! <<<")
         print("="*60 + "\n")
         
-        # Temp fájl törlés
-        os.unlink(temp_file.name)
-
-        # History mentés
+        # History mentés (háttér író: a diktálás nem vár a lemezre)
         if text.strip():
-            history_manager.add_entry(text, elapsed, config["language"])
+            with metrics.span("dictation.history_add"):
+                history_manager.add_entry_async(text, elapsed, config["language"])
             # Menü frissítése a főszálban (QTimer.singleShot thread-safe)
             from PySide6.QtCore import QTimer
             QTimer.singleShot(0, refresh_history_menu)
@@ -495,8 +633,7 @@ def process_audio(audio_copy):
         show_text_popup(text)
 
         # Ikon visszaállítás késleltetéssel
-        time.sleep(3)
-        update_icon('blue', t("tray_ready", ui_lang))
+        reset_icon_later(3)
 
     except Exception as e:
         print("\n" + "="*60)
@@ -504,9 +641,7 @@ def process_audio(audio_copy):
         print("="*60 + "\n")
 
         update_icon('red', t("tray_error", ui_lang))
-        time.sleep(2)
-        hide_popup()
-        update_icon('blue', t("tray_ready", ui_lang))
+        reset_icon_later(2, hide=True)
 
 # Popup kezelés (Signal-alapú thread-safe kommunikáció)
 def show_popup():
@@ -534,11 +669,31 @@ def hide_popup():
         popup_window.request_hide_popup.emit()
 
 # Rögzítés
+def start_streaming_transcriber():
+    """Streaming dictation indítása (ha be van kapcsolva és a backend támogatja)"""
+    if not config.get("streaming_mode", False):
+        return None
+    if whisper_backend != "faster-whisper" or inference_scheduler is None:
+        return None
+    from streaming_dictation import StreamingTranscriber, COMMIT_CLOSED_SEGMENTS
+    streamer = StreamingTranscriber(
+        model,
+        inference_scheduler,
+        language=config["language"],
+        sample_rate=recorder.sample_rate,
+        commit_policy=config.get("streaming_commit_policy", COMMIT_CLOSED_SEGMENTS),
+        interval=config.get("streaming_interval", 1.0),
+    )
+    streamer.start()
+    return streamer
+
 def start_recording():
-    global recording, audio_data
+    global recording, streaming_transcriber, preroll_pending
     if not recording:
+        recorder.reset()
+        preroll_pending = True
+        streaming_transcriber = start_streaming_transcriber()
         recording = True
-        audio_data = []
         # Queue ürítése
         while not amplitude_queue.empty():
             try:
@@ -550,30 +705,53 @@ def start_recording():
         print("\n[RECORDING] Starting...")
         update_icon('red', t("tray_recording", ui_lang))
 
-def stop_recording():
-    global recording, audio_data
+def stop_recording(hotkey_time=None):
+    global recording, streaming_transcriber
     if recording:
         recording = False
+        stop_time = time.perf_counter()
+        streamer, streaming_transcriber = streaming_transcriber, None
         play_sound(SOUND_STOP)
         print("[RECORDING] Stopped")
         update_icon('yellow', t("tray_processing", ui_lang))
 
-        if len(audio_data) > 0:
+        if inference_scheduler is None:
+            print("[FIGYELEM] A modell meg nem toltodott be!")
+            recorder.reset()
+            if streamer:
+                streamer.cancel()
+            update_icon('red', t("tray_error", ui_lang))
+            reset_icon_later(2, hide=True)
+        elif len(recorder) > 0:
             show_processing_popup()  # Processing animáció indítása
-            audio_copy = audio_data.copy()
-            audio_data = []
-            threading.Thread(target=process_audio, args=(audio_copy,), daemon=True).start()
+            with metrics.span("dictation.concat"):
+                audio = recorder.take()  # Zero-copy átadás, a következő felvétel új buffert kap
+            # A cél ablak most is ugyanaz - feloldjuk, amíg a modell dekódol
+            window_future = paste_executor.submit(detect_terminal_window)
+            # Csak a dekódolás fut modell job-ként; a paste és a könyvelés külön szálon
+            job = inference_scheduler.submit(
+                partial(decode_dictation, audio, streamer),
+                PRIORITY_DICTATION, "dictation",
+            )
+            dictation_tail_executor.submit(process_audio, job, stop_time, window_future)
+            if hotkey_time is not None:
+                metrics.observe("dictation.hotkey_to_stop", (time.perf_counter() - hotkey_time) * 1000)
         else:
+            if streamer:
+                streamer.cancel()
             print("[FIGYELEM] Nincs rogzitett hang!")
             hide_popup()
             update_icon('blue', t("tray_ready", ui_lang))
 
 def cancel_recording():
     """Felvétel megszakítása (Escape) - nem dolgozza fel"""
-    global recording, audio_data
+    global recording, streaming_transcriber
     if recording:
         recording = False
-        audio_data = []
+        recorder.reset()
+        if streaming_transcriber:
+            streaming_transcriber.cancel()
+            streaming_transcriber = None
         hide_popup()
         print("[RECORDING] Cancelled")
         update_icon('blue', t("tray_ready", ui_lang))
@@ -620,6 +798,7 @@ def check_hotkey_match():
 
 def on_press(key):
     global hotkey_pressed
+    hotkey_time = time.perf_counter()
 
     # Escape = Cancel (felvétel megszakítása)
     if key == keyboard.Key.esc:
@@ -655,7 +834,7 @@ def on_press(key):
         if not recording:
             start_recording()
         else:
-            stop_recording()
+            stop_recording(hotkey_time)
 
 def on_release(key):
     global hotkey_pressed
@@ -686,7 +865,13 @@ def on_release(key):
 
 # Fő program
 def main():
-    global stream, tray_icon, qt_app, popup_window, tray_icon_updater, history_menu, config, ui_lang
+    global stream, tray_icon, qt_app, popup_window, tray_icon_updater, history_menu, config, ui_lang, recorder, preroll, resampler
+
+    # History backend (journal vagy sqlite)
+    history_manager.configure(backend=config.get("history_backend", "journal"))
+
+    # Metrikák kiírása időzítve (nem a diktálás útján), kilépéskor még egyszer
+    metrics.start_periodic_dump()
 
     # PyQt6 inicializálás (először kell lennie)
     qt_app = QApplication(sys.argv)
@@ -775,6 +960,11 @@ def main():
     except:
         actual_sample_rate = 48000  # Biztonságos alapértelmezett
 
+    # Felvétel 16 kHz-en (a callback resample-öl), a pre-roll natív rate-en (idle-ben nincs resample)
+    resampler = StreamingResampler(actual_sample_rate, WHISPER_SAMPLE_RATE)
+    recorder = AudioRecorder(WHISPER_SAMPLE_RATE)
+    preroll = PreRollBuffer(actual_sample_rate, config.get("preroll_ms", 300))
+
     stream = sd.InputStream(
         samplerate=actual_sample_rate,
         channels=1,